@@ -19,6 +19,21 @@ load_dotenv()
 
 HF_API_KEY = os.getenv("HF_TOKEN")
 
+# OpenAI-compatible LLM endpoint (point LLM_BASE_URL at a local stub in tests)
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://router.huggingface.co/v1")
+LLM_MODEL = os.getenv("LLM_MODEL", "meta-llama/Llama-3.1-8B-Instruct:novita")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))  # seconds per read
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+# Concurrent streaming LLM calls per ASGI process, and how long a request
+# may wait for a slot before it is turned away
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "10"))
+
+# ODBC connection string of the Azure SQL database the anomaly function
+# scores against (used by migrate_anomaly_stats)
+ANOMALY_SQL_CONNECTION_STRING = os.getenv("ANOMALY_SQL_CONNECTION_STRING")
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -112,6 +127,36 @@ DATABASES = {
 }
 
 
+# Cache
+# Generated AI summaries are kept per process unless AI_SUMMARY_CACHE_DIR
+# points the workers at a shared directory.
+
+AI_SUMMARY_CACHE_DIR = os.getenv("AI_SUMMARY_CACHE_DIR")
+# How long a worker's lease on generating a summary lasts; streaming
+# requests wait up to this long for another worker's result
+AI_SUMMARY_LOCK_TIMEOUT = float(os.getenv("AI_SUMMARY_LOCK_TIMEOUT", "60"))
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "ai_summaries": (
+        {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": AI_SUMMARY_CACHE_DIR,
+            "TIMEOUT": 60 * 60 * 24 * 30,
+        }
+        if AI_SUMMARY_CACHE_DIR
+        else {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "ai-summaries",
+            "TIMEOUT": 60 * 60 * 24 * 30,
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    ),
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
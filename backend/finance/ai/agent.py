@@ -10,6 +10,10 @@ from finance.ai.tools import (
     get_category_spending_tool,
 )
 from finance.ai.llm import call_llama
+from finance.services import ai_summary_cache
+
+# Bump whenever build_prompt changes so cached summaries are regenerated
+PROMPT_VERSION = 1
 
 class LlamaLLM(LLM):
     @property
@@ -30,20 +34,55 @@ class LlamaLLM(LLM):
         return self
 
 
-def run_finance_agent(user_id: int, year: int, month: int) -> str:
+def prepare_summary(user_id: int, year: int, month: int):
+    """
+    Returns (data fingerprint, prompt) for the month,
+    or None if the user does not exist.
+    """
     User = get_user_model()
-       
+
     # 1. ACTUALLY CALL YOUR TOOLS
     try:
         user = User.objects.get(id=user_id)
     except User.DoesNotExist:
-        return "User not found."
-    
+        return None
+
     summary = get_monthly_summary(user, year, month)
     categories = get_category_spending(user, year, month)
-    
-    # 2. LLM ANALYSIS ONLY (no tool hallucination possible)
-    prompt = f"""
+
+    return prepare_from_data(user_id, year, month, summary, categories)
+
+
+def prepare_from_data(user_id, year, month, summary, categories):
+    """
+    prepare_summary for inputs that were already loaded (in bulk).
+    """
+    return (
+        ai_summary_cache.fingerprint(PROMPT_VERSION, summary, categories),
+        build_prompt(user_id, year, month, summary, categories),
+    )
+
+
+def run_finance_agent(user_id: int, year: int, month: int) -> str:
+    prepared = prepare_summary(user_id, year, month)
+    if prepared is None:
+        return "User not found."
+
+    data_fingerprint, prompt = prepared
+
+    # 2. Same inputs and prompt → reuse the summary we already paid for
+    return ai_summary_cache.get_or_generate(
+        user_id,
+        year,
+        month,
+        data_fingerprint,
+        lambda: call_llama(prompt),
+    )
+
+
+def build_prompt(user_id, year, month, summary, categories) -> str:
+    # 3. LLM ANALYSIS ONLY (no tool hallucination possible)
+    return f"""
     Analyze this EXACT financial data for user_id={user_id}, {year}-{month:02d}:
     
     SUMMARY: {json.dumps(summary)}
@@ -58,6 +97,3 @@ def run_finance_agent(user_id: int, year: int, month: int) -> str:
     If all zeros: "No transactions found for this period"
     
     """
-    
-    analysis = call_llama(prompt)
-    return analysis
@@ -1,10 +1,39 @@
-from openai import OpenAI
+import asyncio
+import random
+import weakref
+from functools import lru_cache
+
 from django.conf import settings
 
-client = OpenAI(
-    base_url="https://router.huggingface.co/v1",
-    api_key=settings.HF_API_KEY,
-)
+RETRY_BASE_DELAY = 0.5  # seconds
+RETRY_MAX_DELAY = 8.0
+
+
+class LLMUnavailable(Exception):
+    """
+    The LLM could not be reached, kept failing, or every slot was busy.
+    """
+
+
+def _timeout():
+    import httpx
+
+    return httpx.Timeout(settings.LLM_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT)
+
+
+@lru_cache(maxsize=None)
+def get_client():
+    """
+    Built on first use so importing this module stays cheap.
+    """
+    from openai import OpenAI
+
+    return OpenAI(
+        base_url=settings.LLM_BASE_URL,
+        api_key=settings.HF_API_KEY,
+        timeout=_timeout(),
+        max_retries=settings.LLM_MAX_RETRIES,
+    )
 
 
 def call_llama(prompt: str) -> str:
@@ -12,8 +41,8 @@ def call_llama(prompt: str) -> str:
     Calls Llama 3.1 via Hugging Face router.
     """
 
-    completion = client.chat.completions.create(
-        model="meta-llama/Llama-3.1-8B-Instruct:novita",
+    completion = get_client().chat.completions.create(
+        model=settings.LLM_MODEL,
         messages=[
             {
                 "role": "user",
@@ -24,4 +53,95 @@ def call_llama(prompt: str) -> str:
         temperature=0.2,
     )
 
-    return completion.choices[0].message.content
\ No newline at end of file
+    return completion.choices[0].message.content
+
+
+# ---------- Async streaming ----------
+
+# An AsyncOpenAI client and a semaphore belong to one event loop; under an
+# ASGI server that is one per process
+_async_state = weakref.WeakKeyDictionary()
+
+
+def _loop_state():
+    loop = asyncio.get_running_loop()
+    state = _async_state.get(loop)
+    if state is None:
+        from openai import AsyncOpenAI
+
+        client = AsyncOpenAI(
+            base_url=settings.LLM_BASE_URL,
+            api_key=settings.HF_API_KEY,
+            timeout=_timeout(),
+            max_retries=0,  # retried below, with jitter
+        )
+        state = _async_state[loop] = (
+            client,
+            asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY),
+        )
+    return state
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Full-jitter exponential backoff.
+    """
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+async def _open_stream(client, prompt):
+    import openai
+
+    retryable = (
+        openai.APIConnectionError,  # includes APITimeoutError
+        openai.RateLimitError,
+        openai.InternalServerError,
+    )
+
+    for attempt in range(settings.LLM_MAX_RETRIES + 1):
+        try:
+            return await client.chat.completions.create(
+                model=settings.LLM_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=512,
+                temperature=0.2,
+                stream=True,
+            )
+        except retryable as exc:
+            if attempt == settings.LLM_MAX_RETRIES:
+                raise LLMUnavailable(str(exc)) from exc
+            await asyncio.sleep(backoff_delay(attempt))
+        except openai.OpenAIError as exc:
+            raise LLMUnavailable(str(exc)) from exc
+
+
+async def stream_llama(prompt: str):
+    """
+    Yields the completion as text fragments.
+
+    At most LLM_MAX_CONCURRENCY calls run at once per process. Opening the
+    stream is retried; once tokens have been sent a failure is final, since
+    a retry would repeat them.
+    """
+    import httpx
+    import openai
+
+    client, semaphore = _loop_state()
+
+    try:
+        await asyncio.wait_for(semaphore.acquire(), settings.LLM_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise LLMUnavailable("Too many concurrent AI requests")
+
+    try:
+        stream = await _open_stream(client, prompt)
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except (openai.OpenAIError, httpx.HTTPError) as exc:
+            raise LLMUnavailable(str(exc)) from exc
+        finally:
+            await stream.close()
+    finally:
+        semaphore.release()
@@ -0,0 +1,143 @@
+import json
+import os
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from finance.ml import registry
+from finance.ml.anomaly_service import STATS_PATH, z_score_array
+from finance.models import Transaction
+from finance.services import rollup_service
+
+CHECKPOINT_PATH = os.path.join(
+    os.path.dirname(STATS_PATH),
+    "backfill_anomaly_scores.json"
+)
+
+
+class Command(BaseCommand):
+    help = "Recompute anomaly z-scores for existing expenses against the current baselines"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            type=date.fromisoformat,
+            help="Only expenses dated on or after this day (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Transactions scored and written per step",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default=CHECKPOINT_PATH,
+            help="File recording the last finished chunk",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore an existing checkpoint and start from the first transaction",
+        )
+
+    def handle(self, *args, **options):
+        since = options["since"]
+        checkpoint_path = options["checkpoint"]
+        chunk_size = options["chunk_size"]
+
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be positive.")
+
+        last_id = 0
+        checkpoint = self.read_checkpoint(checkpoint_path)
+        if checkpoint and not options["restart"]:
+            if checkpoint["since"] != (since.isoformat() if since else None):
+                raise CommandError(
+                    f"{checkpoint_path} is from a run with --since "
+                    f"{checkpoint['since']}; pass the same value or --restart."
+                )
+            last_id = checkpoint["last_id"]
+            self.stdout.write(f"Resuming after transaction {last_id}.")
+
+        qs = Transaction.objects.filter(type=Transaction.TransactionType.EXPENSE)
+        if since:
+            qs = qs.filter(date__gte=since)
+
+        started = time.monotonic()
+        scanned = 0
+        updated = 0
+
+        # Keyset pagination: every chunk is one indexed range scan, and the
+        # last id doubles as the resume point
+        while True:
+            rows = list(
+                qs.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", "user_id", "category_id", "amount", "anomaly_z_score")
+                [:chunk_size]
+            )
+            if not rows:
+                break
+
+            ids, user_ids, category_ids, amounts, current = zip(*rows)
+            z_scores = z_score_array(user_ids, category_ids, amounts).tolist()
+
+            changed = [
+                (tx_id, user_id, None if z != z else z)
+                for tx_id, user_id, z, old in zip(ids, user_ids, z_scores, current)
+                if not _same_score(old, z)
+            ]
+
+            with transaction.atomic():
+                Transaction.objects.bulk_update(
+                    [Transaction(id=tx_id, anomaly_z_score=z) for tx_id, _, z in changed],
+                    ["anomaly_z_score"],
+                    batch_size=1000,
+                )
+                # Anomaly counts changed: those dashboards must not answer 304
+                rollup_service.touch_monthly_summaries({user_id for _, user_id, _ in changed})
+
+            last_id = ids[-1]
+            scanned += len(rows)
+            updated += len(changed)
+            self.write_checkpoint(checkpoint_path, since, last_id)
+
+            if options["verbosity"] > 1:
+                self.stdout.write(
+                    f"  up to id {last_id}: {scanned} scanned, {updated} updated"
+                )
+
+        if os.path.exists(checkpoint_path):
+            os.unlink(checkpoint_path)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Scanned {scanned} expenses, updated {updated} z-scores "
+                f"in {elapsed:.1f}s."
+            )
+        )
+
+    def read_checkpoint(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def write_checkpoint(self, path, since, last_id):
+        with registry.atomic_write(path) as f:
+            f.write(json.dumps({
+                "since": since.isoformat() if since else None,
+                "last_id": last_id,
+            }).encode())
+
+
+def _same_score(old, new):
+    # NaN (no stats) is stored as NULL
+    if new != new:
+        return old is None
+    return old is not None and abs(old - new) < 1e-9
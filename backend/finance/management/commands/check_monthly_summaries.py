@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.services.rollup_service import (
+    find_monthly_summary_drift,
+    rebuild_monthly_summaries,
+)
+
+
+class Command(BaseCommand):
+    help = "Check MonthlySummary rollups against the raw Transaction table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            help="Only check rollups for this user id",
+        )
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Rebuild the rollups of every user with drift",
+        )
+
+    def handle(self, *args, **options):
+        drift = find_monthly_summary_drift(user_id=options["user"])
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Monthly summaries are consistent."))
+            return
+
+        for d in drift:
+            self.stdout.write(
+                f"user={d['user_id']} {d['year']}-{d['month']:02d}: "
+                f"expected {d['expected']}, found {d['actual']}"
+            )
+
+        if not options["fix"]:
+            raise CommandError(f"{len(drift)} monthly summary rows have drifted.")
+
+        for user_id in sorted({d["user_id"] for d in drift}):
+            rebuild_monthly_summaries(user_id=user_id)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Fixed {len(drift)} drifted monthly summary rows.")
+        )
@@ -1,90 +1,172 @@
-import os
-import pickle
-from collections import defaultdict
 from datetime import date
+from multiprocessing import Pool
+
+import numpy as np
 from dateutil.relativedelta import relativedelta
 
 from django.core.management.base import BaseCommand
-from django.utils.timezone import now
+from django.db import connections
+from django.db.models import Count, FloatField, Q, Sum
+from django.db.models.functions import Cast
 
+from finance.ml.anomaly_service import STATS_PATH
+from finance.ml.stats_store import write_stats
 from finance.models import Transaction
 
+MIN_SAMPLES = 5
 
-class Command(BaseCommand):
-    help = "Compute per-user, per-category anomaly statistics (Z-score baselines)"
-
-    def handle(self, *args, **options):
-        today = date.today()
-        three_months_ago = today - relativedelta(months=3)
 
-        stats = defaultdict(dict)
+def aggregate_baselines(task):
+    """
+    Streams one grouped query over a user-id shard.
 
-        users = (
-            Transaction.objects
-            .values_list("user_id", flat=True)
-            .distinct()
-        )
+    Every (user, category) group carries count / sum / sum of squares for
+    both the 3-month window and all time, so the window-vs-fallback choice
+    needs no second query.
 
-        for user_id in users:
-            user_txns = Transaction.objects.filter(
-                user_id=user_id,
-                type=Transaction.TransactionType.EXPENSE
-            )
+    Returns:
+        np.ndarray of shape (groups, 8):
+        user_id, category_id, n_recent, s_recent, ss_recent, n_all, s_all, ss_all
+    """
+    since, user_range = task
 
-            if not user_txns.exists():
-                continue
+    qs = Transaction.objects.filter(type=Transaction.TransactionType.EXPENSE)
+    if user_range is not None:
+        qs = qs.filter(user_id__gte=user_range[0], user_id__lt=user_range[1])
 
-            categories = (
-                user_txns
-                .values_list("category_id", flat=True)
-                .distinct()
-            )
+    amount = Cast("amount", FloatField())
+    recent = Q(date__gte=since)
 
-            for category_id in categories:
-                recent_txns = user_txns.filter(
-                    category_id=category_id,
-                    date__gte=three_months_ago
-                )
+    rows = (
+        qs
+        .values("user_id", "category_id")
+        .annotate(
+            n_recent=Count("id", filter=recent),
+            s_recent=Sum(amount, filter=recent),
+            ss_recent=Sum(amount * amount, filter=recent),
+            n_all=Count("id"),
+            s_all=Sum(amount),
+            ss_all=Sum(amount * amount),
+        )
+        .order_by()
+        .values_list(
+            "user_id", "category_id",
+            "n_recent", "s_recent", "ss_recent",
+            "n_all", "s_all", "ss_all",
+        )
+    )
+
+    return np.array(
+        [[v if v is not None else 0.0 for v in row] for row in rows.iterator(chunk_size=5000)],
+        dtype=np.float64,
+    ).reshape(-1, 8)
+
+
+def _aggregate_shard(task):
+    try:
+        return aggregate_baselines(task)
+    finally:
+        connections.close_all()
+
+
+def reduce_baselines(data):
+    """
+    Vectorized mean / population std per group.
+
+    Returns:
+        dict: {user_id: {category_id: {"mean", "std", "count"}}}
+    """
+    n_recent, s_recent, ss_recent = data[:, 2], data[:, 3], data[:, 4]
+    n_all, s_all, ss_all = data[:, 5], data[:, 6], data[:, 7]
+
+    # Prefer the 3-month window when it has enough samples
+    use_recent = n_recent >= MIN_SAMPLES
+    n = np.where(use_recent, n_recent, n_all)
+    s = np.where(use_recent, s_recent, s_all)
+    ss = np.where(use_recent, ss_recent, ss_all)
+
+    enough = n >= MIN_SAMPLES
+    n_safe = np.where(enough, n, 1)
+    mean = s / n_safe
+    std = np.sqrt(np.maximum(ss / n_safe - mean * mean, 0.0))
+
+    # sum-of-squares variance leaves rounding noise where all amounts are equal
+    keep = enough & (std > 1e-9 * np.maximum(np.abs(mean), 1.0))
+
+    stats = {}
+    for user_id, category_id, m, sd, count in zip(
+        data[keep, 0].astype(int).tolist(),
+        data[keep, 1].astype(int).tolist(),
+        mean[keep].tolist(),
+        std[keep].tolist(),
+        n[keep].astype(int).tolist(),
+    ):
+        stats.setdefault(user_id, {})[category_id] = {
+            "mean": m,
+            "std": sd,
+            "count": count,
+        }
+
+    return stats
+
+
+def user_shards(workers):
+    """
+    Splits the user-id space into `workers` contiguous, index-friendly ranges.
+    """
+    user_ids = (
+        Transaction.objects
+        .values_list("user_id", flat=True)
+        .distinct()
+        .order_by("user_id")
+    )
+    user_ids = list(user_ids)
+    if not user_ids:
+        return []
+
+    bounds = np.array_split(np.array(user_ids), workers)
+    return [
+        (int(chunk[0]), int(chunk[-1]) + 1)
+        for chunk in bounds
+        if len(chunk)
+    ]
 
-                qs = recent_txns if recent_txns.count() >= 5 else user_txns.filter(
-                    category_id=category_id
-                )
 
-                amounts = list(qs.values_list("amount", flat=True))
+class Command(BaseCommand):
+    help = "Compute per-user, per-category anomaly statistics (Z-score baselines)"
 
-                if len(amounts) < 5:
-                    continue  # insufficient data
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Shard users across this many processes",
+        )
 
-                mean = float(sum(amounts)) / len(amounts)
-                variance = sum((float(x) - mean) ** 2 for x in amounts) / len(amounts)
-                std = variance ** 0.5
+    def handle(self, *args, **options):
+        today = date.today()
+        three_months_ago = today - relativedelta(months=3)
+        workers = options["workers"]
 
-                if std == 0:
-                    continue
+        if workers > 1:
+            tasks = [(three_months_ago, shard) for shard in user_shards(workers)]
 
-                stats[user_id][category_id] = {
-                    "mean": float(mean),
-                    "std": float(std),
-                    "count": len(amounts),
-                }
+            # Children must open their own connections
+            connections.close_all()
+            with Pool(workers) as pool:
+                parts = pool.map(_aggregate_shard, tasks)
 
-        model_dir = os.path.join(
-            os.path.dirname(__file__),
-            "..",
-            "..",
-            "ml",
-            "models"
-        )
-        model_dir = os.path.abspath(model_dir)
-        os.makedirs(model_dir, exist_ok=True)
+            data = np.vstack(parts) if parts else np.empty((0, 8))
+        else:
+            data = aggregate_baselines((three_months_ago, None))
 
-        model_path = os.path.join(model_dir, "anomaly_stats.pkl")
+        stats = reduce_baselines(data)
 
-        with open(model_path, "wb") as f:
-            pickle.dump(dict(stats), f)
+        # Atomic rename: running workers pick the new file up on their next lookup
+        write_stats(STATS_PATH, stats)
 
         self.stdout.write(
             self.style.SUCCESS(
-                f"Anomaly stats computed and saved to {model_path}"
+                f"Anomaly stats computed and saved to {STATS_PATH}"
             )
         )
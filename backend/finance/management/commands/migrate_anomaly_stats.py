@@ -1,62 +1,425 @@
-import pickle
-import pyodbc
-from django.core.management.base import BaseCommand
+import hashlib
+import sqlite3
+import struct
 from pathlib import Path
 
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.ml.anomaly_service import STATS_PATH
+from finance.ml.stats_store import iter_stats
+
+STAGING_CHUNK = 10000  # rows per executemany call
+DIFF_SAMPLE = 10  # rows of each kind listed by --dry-run
+
+# Brings an existing target up to what the sync needs: a content_hash column
+# and one row per (user_id, category_id). Earlier runs appended duplicates;
+# the newest of each pair is kept. Safe to run every time.
+SCHEMA_SQL = {
+    "azure": [
+        """
+        IF COL_LENGTH('anomaly_stats', 'content_hash') IS NULL
+            ALTER TABLE anomaly_stats ADD content_hash CHAR(16) NULL
+        """,
+        """
+        IF NOT EXISTS (
+            SELECT 1 FROM sys.indexes WHERE name = 'ux_anomaly_stats_user_category'
+        )
+        BEGIN
+            DELETE s FROM anomaly_stats AS s
+            WHERE EXISTS (
+                SELECT 1 FROM anomaly_stats AS n
+                WHERE n.user_id = s.user_id
+                  AND n.category_id = s.category_id
+                  AND n.id > s.id
+            );
+            CREATE UNIQUE INDEX ux_anomaly_stats_user_category
+                ON anomaly_stats (user_id, category_id);
+        END
+        """,
+        """
+        IF OBJECT_ID('anomaly_stats_version') IS NULL
+        BEGIN
+            CREATE TABLE anomaly_stats_version (
+                id INT PRIMARY KEY,
+                version INT NOT NULL,
+                updated_at DATETIME DEFAULT GETDATE()
+            );
+            INSERT INTO anomaly_stats_version (id, version) VALUES (1, 0);
+        END
+        """,
+    ],
+    "sqlite": [
+        """
+        CREATE TABLE IF NOT EXISTS anomaly_stats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            mean REAL NOT NULL,
+            std_dev REAL NOT NULL,
+            sample_count INTEGER NOT NULL,
+            content_hash TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        # ADD COLUMN is added below for tables created without content_hash
+        """
+        DELETE FROM anomaly_stats
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM anomaly_stats GROUP BY user_id, category_id
+        )
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_anomaly_stats_user_category
+            ON anomaly_stats (user_id, category_id)
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS anomaly_stats_version (
+            id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "INSERT OR IGNORE INTO anomaly_stats_version (id, version) VALUES (1, 0)",
+    ],
+}
+
+# What --dry-run reads instead of running SCHEMA_SQL: each query returns
+# a count, non-zero when that part of the schema is already in place
+INSPECT_SQL = {
+    "azure": {
+        "table": "SELECT COUNT(*) FROM sys.tables WHERE name = 'anomaly_stats'",
+        "content_hash": """
+            SELECT CASE WHEN COL_LENGTH('anomaly_stats', 'content_hash') IS NULL
+                THEN 0 ELSE 1 END
+        """,
+        "unique_index": """
+            SELECT COUNT(*) FROM sys.indexes WHERE name = 'ux_anomaly_stats_user_category'
+        """,
+        "version_table": "SELECT COUNT(*) FROM sys.tables WHERE name = 'anomaly_stats_version'",
+    },
+    "sqlite": {
+        "table": """
+            SELECT COUNT(*) FROM sqlite_master
+            WHERE type = 'table' AND name = 'anomaly_stats'
+        """,
+        "content_hash": """
+            SELECT COUNT(*) FROM pragma_table_info('anomaly_stats')
+            WHERE name = 'content_hash'
+        """,
+        "unique_index": """
+            SELECT COUNT(*) FROM sqlite_master
+            WHERE type = 'index' AND name = 'ux_anomaly_stats_user_category'
+        """,
+        "version_table": """
+            SELECT COUNT(*) FROM sqlite_master
+            WHERE type = 'table' AND name = 'anomaly_stats_version'
+        """,
+    },
+}
+
+# Rows the unique-index upgrade would delete (all but the newest per pair)
+DUPLICATES_SQL = """
+    SELECT COUNT(*) FROM anomaly_stats AS s
+    WHERE EXISTS (
+        SELECT 1 FROM anomaly_stats AS n
+        WHERE n.user_id = s.user_id
+          AND n.category_id = s.category_id
+          AND n.id > s.id
+    )
+"""
+
+CREATE_STAGING_SQL = {
+    "azure": """
+        CREATE TABLE #anomaly_stats_staging (
+            user_id INT NOT NULL,
+            category_id INT NOT NULL,
+            mean FLOAT NOT NULL,
+            std_dev FLOAT NOT NULL,
+            sample_count INT NOT NULL,
+            content_hash CHAR(16) NOT NULL
+        )
+    """,
+    "sqlite": """
+        CREATE TEMP TABLE anomaly_stats_staging (
+            user_id INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            mean REAL NOT NULL,
+            std_dev REAL NOT NULL,
+            sample_count INTEGER NOT NULL,
+            content_hash TEXT NOT NULL
+        )
+    """,
+}
+
+STAGING_TABLE = {
+    "azure": "#anomaly_stats_staging",
+    "sqlite": "anomaly_stats_staging",
+}
+
+UPSERT_SQL = {
+    "azure": """
+        MERGE anomaly_stats WITH (HOLDLOCK) AS t
+        USING #anomaly_stats_staging AS s
+           ON t.user_id = s.user_id AND t.category_id = s.category_id
+        WHEN MATCHED THEN UPDATE SET
+            mean = s.mean,
+            std_dev = s.std_dev,
+            sample_count = s.sample_count,
+            content_hash = s.content_hash
+        WHEN NOT MATCHED THEN
+            INSERT (user_id, category_id, mean, std_dev, sample_count, content_hash)
+            VALUES (s.user_id, s.category_id, s.mean, s.std_dev, s.sample_count, s.content_hash);
+    """,
+    "sqlite": """
+        INSERT INTO anomaly_stats
+            (user_id, category_id, mean, std_dev, sample_count, content_hash)
+        SELECT user_id, category_id, mean, std_dev, sample_count, content_hash
+        FROM anomaly_stats_staging
+        WHERE true
+        ON CONFLICT (user_id, category_id) DO UPDATE SET
+            mean = excluded.mean,
+            std_dev = excluded.std_dev,
+            sample_count = excluded.sample_count,
+            content_hash = excluded.content_hash
+    """,
+}
+
+BUMP_VERSION_SQL = {
+    "azure": """
+        UPDATE anomaly_stats_version
+        SET version = version + 1, updated_at = GETDATE()
+        WHERE id = 1
+    """,
+    "sqlite": """
+        UPDATE anomaly_stats_version
+        SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+        WHERE id = 1
+    """,
+}
+
+VALUES = struct.Struct("<ddq")
+
+
+def content_hash(mean, std, count) -> str:
+    """
+    16 hex chars identifying one row's values, stored next to the row.
+    """
+    return hashlib.blake2b(VALUES.pack(mean, std, count), digest_size=8).hexdigest()
+
 
 class Command(BaseCommand):
-    help = "Migrate anomaly stats from .pkl to Azure SQL"
+    help = "Sync anomaly stats from the stats file to Azure SQL, shipping only changed rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would be inserted, updated and deleted; change nothing",
+        )
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help="Also delete rows for pairs that are no longer in the stats file",
+        )
+        parser.add_argument(
+            "--sqlite",
+            metavar="PATH",
+            help="Sync into this SQLite file instead of Azure SQL (local testing)",
+        )
 
     def handle(self, *args, **options):
-        # Path to pickle file
-        stats_path = Path("finance/ml/models/anomaly_stats.pkl")
+        stats_path = Path(STATS_PATH)
 
         if not stats_path.exists():
             self.stdout.write(self.style.ERROR("Stats file not found"))
             return
 
-        # Load pickle
-        with open(stats_path, "rb") as f:
-            stats = pickle.load(f)
+        local = {
+            (user_id, category_id): (mean, std, count, content_hash(mean, std, count))
+            for user_id, category_id, mean, std, count in iter_stats(stats_path)
+        }
+
+        self.stdout.write(f"Loaded {len(local)} stats rows.")
+
+        target, conn = self.connect(options["sqlite"])
+        try:
+            if options["dry_run"]:
+                # Read-only: report the upgrade ensure_schema would make
+                schema = self.inspect_schema(target, conn)
+            else:
+                self.ensure_schema(target, conn)
+                schema = {"table": True, "content_hash": True}
+
+            remote = self.read_remote(conn, schema)
 
-        self.stdout.write("Loaded stats from pickle.")
+            inserts = [key for key in local if key not in remote]
+            updates = [
+                key for key in local
+                if key in remote and remote[key] != local[key][3]
+            ]
+            deletes = [key for key in remote if key not in local]
 
-        # Azure SQL connection details
-        server = "financetrack-sql-server.database.windows.net"
-        database = "finance-anomaly-db"
-        username = "sqladmin"
-        password = "Idontknow@123"
+            self.stdout.write(
+                f"{len(inserts)} new, {len(updates)} changed, "
+                f"{len(local) - len(inserts) - len(updates)} unchanged, "
+                f"{len(deletes)} only in target"
+                + (" (kept, pass --prune to delete)" if deletes and not options["prune"] else "")
+            )
 
-        conn_str = (
-            "DRIVER={ODBC Driver 18 for SQL Server};"
-            f"SERVER={server};"
-            f"DATABASE={database};"
-            f"UID={username};"
-            f"PWD={password}"
+            if options["dry_run"]:
+                self.show_diff("insert", inserts, local)
+                self.show_diff("update", updates, local)
+                if options["prune"]:
+                    self.show_diff("delete", deletes, local)
+                self.stdout.write(self.style.WARNING("Dry run: nothing written."))
+                return
+
+            if not options["prune"]:
+                deletes = []
+
+            if not inserts and not updates and not deletes:
+                self.stdout.write(self.style.SUCCESS("Target already up to date."))
+                return
+
+            self.apply(target, conn, inserts + updates, deletes, local)
+        finally:
+            conn.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Inserted {len(inserts)}, updated {len(updates)}, "
+                f"deleted {len(deletes)} anomaly stat rows."
+            )
         )
 
-        conn = pyodbc.connect(conn_str)
+    def connect(self, sqlite_path):
+        if sqlite_path:
+            return "sqlite", sqlite3.connect(sqlite_path)
+
+        if not settings.ANOMALY_SQL_CONNECTION_STRING:
+            raise CommandError(
+                "Set ANOMALY_SQL_CONNECTION_STRING, or pass --sqlite PATH."
+            )
+
+        # Imported here: only this command talks to Azure SQL
+        import pyodbc
+
+        return "azure", pyodbc.connect(settings.ANOMALY_SQL_CONNECTION_STRING)
+
+    def inspect_schema(self, target, conn):
+        """
+        Checks what ensure_schema would change, with SELECTs only, and
+        reports it. Returns {check name: already in place}.
+        """
         cursor = conn.cursor()
+        schema = {}
+        for name, sql in INSPECT_SQL[target].items():
+            cursor.execute(sql)
+            schema[name] = bool(cursor.fetchone()[0])
+
+        pending = []
+        if not schema["table"]:
+            pending.append("create table anomaly_stats")
+        else:
+            if not schema["content_hash"]:
+                pending.append("add column content_hash")
+            if not schema["unique_index"]:
+                cursor.execute(DUPLICATES_SQL)
+                duplicates = cursor.fetchone()[0]
+                pending.append(
+                    f"delete {duplicates} duplicate rows and add unique index "
+                    "ux_anomaly_stats_user_category"
+                )
+        if not schema["version_table"]:
+            pending.append("create table anomaly_stats_version")
 
-        inserted = 0
+        for change in pending:
+            self.stdout.write(f"  schema: would {change}")
+        if not pending:
+            self.stdout.write("  schema: up to date")
 
-        for user_id, categories in stats.items():
-            for category_id, values in categories.items():
-                mean = values["mean"]
-                std = values["std"]
-                count = values["count"]
+        return schema
 
-                cursor.execute("""
-                    INSERT INTO anomaly_stats
-                    (user_id, category_id, mean, std_dev, sample_count)
-                    VALUES (?, ?, ?, ?, ?)
-                """, user_id, category_id, mean, std, count)
+    def read_remote(self, conn, schema):
+        """
+        Returns {(user_id, category_id): content_hash} for the target's rows;
+        hashes are None when the column doesn't exist yet.
+        """
+        if not schema["table"]:
+            return {}
 
-                inserted += 1
+        hash_column = "content_hash" if schema["content_hash"] else "NULL"
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT user_id, category_id, {hash_column} FROM anomaly_stats"
+        )
+        return {
+            (user_id, category_id): row_hash
+            for user_id, category_id, row_hash in cursor.fetchall()
+        }
 
+    def ensure_schema(self, target, conn):
+        cursor = conn.cursor()
+        statements = SCHEMA_SQL[target]
+
+        if target == "sqlite":
+            cursor.execute(statements[0])
+            columns = {row[1] for row in cursor.execute("PRAGMA table_info(anomaly_stats)")}
+            if "content_hash" not in columns:
+                cursor.execute("ALTER TABLE anomaly_stats ADD COLUMN content_hash TEXT")
+            statements = statements[1:]
+
+        for sql in statements:
+            cursor.execute(sql)
         conn.commit()
-        conn.close()
 
-        self.stdout.write(
-            self.style.SUCCESS(f"Inserted {inserted} anomaly stat rows.")
-        )
+    def apply(self, target, conn, keys, deletes, local):
+        """
+        Stages the changed rows and upserts them in one statement, then bumps
+        the version stamp so warm function instances reload. One transaction.
+        """
+        cursor = conn.cursor()
+        if target == "azure":
+            # Parameter arrays instead of one round trip per row
+            cursor.fast_executemany = True
+
+        rows = [(*key, *local[key]) for key in keys]
+
+        try:
+            if rows:
+                cursor.execute(CREATE_STAGING_SQL[target])
+                insert = (
+                    f"INSERT INTO {STAGING_TABLE[target]} "
+                    "(user_id, category_id, mean, std_dev, sample_count, content_hash) "
+                    "VALUES (?, ?, ?, ?, ?, ?)"
+                )
+                for start in range(0, len(rows), STAGING_CHUNK):
+                    cursor.executemany(insert, rows[start:start + STAGING_CHUNK])
+
+                cursor.execute(UPSERT_SQL[target])
+                cursor.execute(f"DROP TABLE {STAGING_TABLE[target]}")
+
+            if deletes:
+                cursor.executemany(
+                    "DELETE FROM anomaly_stats WHERE user_id = ? AND category_id = ?",
+                    deletes,
+                )
+
+            cursor.execute(BUMP_VERSION_SQL[target])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def show_diff(self, action, keys, local):
+        for user_id, category_id in keys[:DIFF_SAMPLE]:
+            values = local.get((user_id, category_id))
+            detail = (
+                f" mean={values[0]:.2f} std={values[1]:.2f} count={values[2]}"
+                if values else ""
+            )
+            self.stdout.write(f"  {action} user={user_id} category={category_id}{detail}")
+
+        if len(keys) > DIFF_SAMPLE:
+            self.stdout.write(f"  ... and {len(keys) - DIFF_SAMPLE} more to {action}")
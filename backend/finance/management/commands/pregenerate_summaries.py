@@ -0,0 +1,164 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.models import MonthlyAISummary
+from finance.services import ai_summary_cache
+from finance.services.summary_service import (
+    get_category_spending_by_user,
+    get_monthly_summaries,
+)
+
+
+class RateLimiter:
+    """
+    Spaces calls at least 1/rate seconds apart across threads.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class Command(BaseCommand):
+    help = "Generate AI monthly summaries ahead of time for every user active in a month"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int)
+        parser.add_argument(
+            "--month",
+            type=int,
+            help="Defaults, with --year, to the previous month",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Concurrent LLM calls",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=2.0,
+            help="Maximum LLM calls per second (0 = unlimited)",
+        )
+        parser.add_argument("--limit", type=int, help="Stop after this many users")
+        parser.add_argument(
+            "--benchmark",
+            action="store_true",
+            help="Use a stub LLM that sleeps --stub-latency seconds; nothing is saved",
+        )
+        parser.add_argument("--stub-latency", type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        # Imported here: langchain/openai are slow to load
+        from finance.ai.agent import prepare_from_data
+        from finance.ai.llm import call_llama
+
+        year, month = self.target_month(options)
+
+        # Two grouped queries for every active user instead of two per user
+        summaries = get_monthly_summaries(year, month)
+        categories = get_category_spending_by_user(year, month, summaries.keys())
+
+        # Resumable: users whose stored summary still matches are skipped.
+        # The whole month, not user_id__in: one bound parameter per user
+        # would exceed SQLite's limit at thousands of users
+        done = dict(
+            MonthlyAISummary.objects
+            .filter(year=year, month=month)
+            .values_list("user_id", "fingerprint")
+        )
+
+        tasks = []
+        for user_id, summary in summaries.items():
+            data_fingerprint, prompt = prepare_from_data(
+                user_id, year, month, summary, categories[user_id]
+            )
+            if done.get(user_id) != data_fingerprint:
+                tasks.append((user_id, data_fingerprint, prompt))
+
+        up_to_date = len(summaries) - len(tasks)
+        if options["limit"] is not None:
+            tasks = tasks[:options["limit"]]
+
+        self.stdout.write(
+            f"{year}-{month:02d}: {len(summaries)} active users, "
+            f"{up_to_date} up to date, {len(tasks)} to generate"
+        )
+
+        if options["benchmark"]:
+            latency = options["stub_latency"]
+
+            def generate(prompt):
+                time.sleep(latency)
+                return "stub summary"
+        else:
+            generate = call_llama
+
+        limiter = RateLimiter(options["rate"])
+
+        def run(task):
+            user_id, data_fingerprint, prompt = task
+            limiter.wait()
+            return user_id, data_fingerprint, generate(prompt)
+
+        started = time.monotonic()
+        generated = 0
+        failed = 0
+
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            futures = [pool.submit(run, task) for task in tasks]
+
+            # Results are saved from this thread; workers never touch the DB
+            for future in as_completed(futures):
+                try:
+                    user_id, data_fingerprint, summary = future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"  LLM call failed: {exc}")
+                    continue
+
+                if not options["benchmark"]:
+                    ai_summary_cache.store(user_id, year, month, data_fingerprint, summary)
+
+                generated += 1
+                if options["verbosity"] > 1:
+                    self.stdout.write(f"  {generated}/{len(tasks)} generated")
+
+        elapsed = time.monotonic() - started
+        rate = generated / elapsed if elapsed else 0.0
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {generated} summaries ({failed} failed) "
+                f"in {elapsed:.1f}s, {rate:.2f}/s."
+            )
+        )
+
+    def target_month(self, options):
+        year, month = options["year"], options["month"]
+
+        if year is None and month is None:
+            previous = date.today() - relativedelta(months=1)
+            return previous.year, previous.month
+
+        if year is None or month is None:
+            raise CommandError("Pass both --year and --month, or neither.")
+        if not 1 <= month <= 12:
+            raise CommandError("--month must be between 1 and 12.")
+
+        return year, month
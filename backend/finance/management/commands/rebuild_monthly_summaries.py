@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from finance.services.rollup_service import rebuild_monthly_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild MonthlySummary rollups from the raw Transaction table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            help="Only rebuild rollups for this user id",
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild_monthly_summaries(user_id=options["user"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {written} monthly summary rows.")
+        )
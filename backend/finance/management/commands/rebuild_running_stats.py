@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from finance.ml.running_stats import rebuild_running_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the incremental anomaly baselines (CategoryRunningStats) from transactions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            help="Only rebuild baselines for this user id",
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild_running_stats(user_id=options["user"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {written} running stats rows.")
+        )
@@ -0,0 +1,235 @@
+import random
+import time
+from datetime import date, timedelta
+from itertools import islice
+from multiprocessing import Pool
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+
+from finance.ml.running_stats import rebuild_running_stats
+from finance.models import Category, Transaction
+from finance.services.rollup_service import (
+    rebuild_category_spending,
+    rebuild_monthly_summaries,
+)
+
+
+CATEGORY_NAMES = [
+    "Food",
+    "Rent",
+    "Travel",
+    "Utilities",
+    "Entertainment",
+    "Healthcare",
+    "Other",
+]
+
+
+# Category-specific keywords for realistic notes
+CATEGORY_KEYWORDS = {
+    "Food": ["pizza", "restaurant", "burger", "lunch", "dinner", "cafe"],
+    "Rent": ["rent", "apartment", "house", "flat", "lease", "landlord"],
+    "Travel": ["uber", "flight", "bus", "train", "taxi", "airport"],
+    "Utilities": ["electricity", "water", "internet", "gas", "bill"],
+    "Entertainment": ["movie", "concert", "game", "netflix", "theater"],
+    "Healthcare": ["doctor", "medicine", "hospital", "clinic", "pharmacy"],
+    "Other": ["misc", "shopping", "purchase", "general", "item"],
+}
+
+
+def generate_user_rows(task):
+    """
+    Generates the transaction rows of one user.
+
+    Runs in worker processes, so it only touches plain data. Each user gets
+    its own RNG derived from (seed, user index), which keeps the output
+    identical regardless of the number of workers.
+
+    Returns:
+        (user_index, [(category_name, type, amount, date, note), ...])
+    """
+    user_index, count, seed, days, today, words = task
+    rng = random.Random(f"{seed}:{user_index}")
+
+    rows = []
+    for _ in range(count):
+        type_ = rng.choices(["INCOME", "EXPENSE"], weights=[0.3, 0.7])[0]
+        category = rng.choice(CATEGORY_NAMES)
+
+        if type_ == "EXPENSE":
+            amount = round(rng.uniform(100, 5000), 2)
+            keyword = rng.choice(CATEGORY_KEYWORDS[category])
+            note = f"{keyword} {rng.choice(words)} {rng.choice(words)}"
+        else:
+            amount = round(rng.uniform(5000, 20000), 2)
+            note = f"salary {rng.choice(words)}"
+
+        tx_date = today - timedelta(days=rng.randint(0, days))
+        rows.append((category, type_, amount, tx_date, note))
+
+    return user_index, rows
+
+
+class Command(BaseCommand):
+    help = "Seed users, categories and transactions with fake data for development and load tests"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--transactions-per-user", type=int, default=500)
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Spread transaction dates over this many days before today",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes used to generate fake rows (1 = in-process)",
+        )
+        parser.add_argument("--password", default="password123")
+        parser.add_argument(
+            "--skip-rollups",
+            action="store_true",
+            help="Do not rebuild the summary rollups and anomaly baselines after seeding",
+        )
+
+    def handle(self, *args, **options):
+        from faker import Faker
+
+        if options["users"] < 1:
+            raise CommandError("--users must be at least 1.")
+
+        started = time.monotonic()
+        seed = options["seed"]
+
+        fake = Faker()
+        fake.seed_instance(seed)
+        words = fake.words(nb=1000)
+
+        user_ids = self.create_users(options)
+        categories = self.create_categories(user_ids)
+
+        tasks = (
+            (
+                index,
+                options["transactions_per_user"],
+                seed,
+                options["days"],
+                date.today(),
+                words,
+            )
+            for index in range(len(user_ids))
+        )
+
+        if options["workers"] > 1:
+            with Pool(options["workers"]) as pool:
+                results = pool.imap(generate_user_rows, tasks, chunksize=4)
+                created = self.write_transactions(results, user_ids, categories, options)
+        else:
+            results = map(generate_user_rows, tasks)
+            created = self.write_transactions(results, user_ids, categories, options)
+
+        if not options["skip_rollups"]:
+            rebuild_monthly_summaries()
+            rebuild_category_spending()
+            rebuild_running_stats()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {len(user_ids)} users and {created} transactions "
+                f"in {time.monotonic() - started:.1f}s."
+            )
+        )
+
+    def create_users(self, options):
+        User = get_user_model()
+        seed = options["seed"]
+
+        # Hash once: every seeded user shares the same password
+        password = make_password(options["password"])
+
+        # Derived from (seed, index) like the emails: Faker usernames repeat
+        users = [
+            User(
+                username=f"seed{seed}_user{index}",
+                email=f"seed{seed}.user{index}@example.com",
+                password=password,
+            )
+            for index in range(options["users"])
+        ]
+
+        # One indexed prefix query covers every name this seed can generate
+        taken = User.objects.filter(
+            Q(username__startswith=f"seed{seed}_user")
+            | Q(email__startswith=f"seed{seed}.user")
+        )
+        if taken.exists():
+            raise CommandError(
+                f"Users for --seed {seed} already exist; pick another seed."
+            )
+
+        created = User.objects.bulk_create(users, batch_size=options["batch_size"])
+        return [user.pk for user in created]
+
+    def create_categories(self, user_ids):
+        """
+        Returns:
+            dict: {(user_id, category_name): category_id}
+        """
+        Category.objects.bulk_create(
+            [
+                Category(user_id=user_id, name=name)
+                for user_id in user_ids
+                for name in CATEGORY_NAMES
+            ],
+            batch_size=5000,
+        )
+
+        return {
+            (user_id, name): category_id
+            for category_id, user_id, name in (
+                Category.objects
+                .filter(user_id__in=user_ids, name__in=CATEGORY_NAMES)
+                .values_list("id", "user_id", "name")
+            )
+        }
+
+    def write_transactions(self, results, user_ids, categories, options):
+        def iter_transactions():
+            for user_index, rows in results:
+                user_id = user_ids[user_index]
+                for category, type_, amount, tx_date, note in rows:
+                    yield Transaction(
+                        user_id=user_id,
+                        category_id=categories[(user_id, category)],
+                        type=type_,
+                        amount=amount,
+                        date=tx_date,
+                        note=note,
+                    )
+
+        batch_size = options["batch_size"]
+        objs = iter_transactions()
+        created = 0
+
+        while True:
+            batch = list(islice(objs, batch_size))
+            if not batch:
+                break
+
+            with transaction.atomic():
+                Transaction.objects.bulk_create(batch, batch_size=batch_size)
+
+            created += len(batch)
+            if options["verbosity"] > 1:
+                self.stdout.write(f"  {created} transactions written")
+
+        return created
@@ -1,79 +1,99 @@
-import os
-import pickle
-
 from django.core.management.base import BaseCommand
 from finance.models import Transaction
-from finance.ml.inference import _clean_text
-from sklearn.feature_extraction.text import CountVectorizer
+from finance.ml.inference import MODEL_PATH, _clean_text, model_version, publish_model
+from sklearn.feature_extraction.text import HashingVectorizer
 from sklearn.naive_bayes import MultinomialNB
 
 
 class Command(BaseCommand):
     help = "Train global Naive Bayes model for expense category prediction"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=10000,
+            help="Rows fetched and fitted per partial_fit step",
+        )
+        parser.add_argument(
+            "--n-features",
+            type=int,
+            default=2 ** 16,
+            help="Hashing space size of the vectorizer",
+        )
+
     def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+
         qs = (
             Transaction.objects
             .filter(type=Transaction.TransactionType.EXPENSE)
             .exclude(note__isnull=True)
             .exclude(note__exact="")
-            .select_related("category")
         )
 
-        if qs.count() < 10:
+        # partial_fit needs every class up front; this is a small DISTINCT.
+        # Lowered in Python like the labels below: SQLite's LOWER is ASCII-only
+        classes = sorted({
+            name.lower()
+            for name in qs.values_list("category__name", flat=True).distinct()
+        })
+
+        if len(classes) < 2:
             self.stdout.write(
                 self.style.WARNING(
-                    "Not enough data to train model (need at least 10 samples)."
+                    "Need at least 2 categories to train classifier."
                 )
             )
             return
 
+        # Stateless: no vocabulary to fit or hold in memory
+        vectorizer = HashingVectorizer(
+            ngram_range=(1, 2),
+            n_features=options["n_features"],
+            alternate_sign=False,
+            norm=None,
+        )
+        clf = MultinomialNB()
+
         texts = []
         labels = []
+        samples = 0
+
+        def fit_chunk():
+            clf.partial_fit(vectorizer.transform(texts), labels, classes=classes)
+            texts.clear()
+            labels.clear()
+
+        rows = qs.values_list("note", "category__name").iterator(chunk_size=chunk_size)
 
-        for tx in qs:
-            cleaned = _clean_text(tx.note)
+        for note, category_name in rows:
+            cleaned = _clean_text(note)
             if not cleaned:
                 continue
             texts.append(cleaned)
-            labels.append(tx.category.name.lower())
+            labels.append(category_name.lower())
+            samples += 1
 
-        if len(set(labels)) < 2:
+            if len(texts) >= chunk_size:
+                fit_chunk()
+
+        if texts:
+            fit_chunk()
+
+        if samples < 10:
             self.stdout.write(
                 self.style.WARNING(
-                    "Need at least 2 categories to train classifier."
+                    "Not enough data to train model (need at least 10 samples)."
                 )
             )
             return
 
-        vectorizer = CountVectorizer(
-            ngram_range=(1, 2),
-            min_df=2
-        )
-        X = vectorizer.fit_transform(texts)
-
-        clf = MultinomialNB()
-        clf.fit(X, labels)
-
-        model = (vectorizer, clf)
-
-        model_dir = os.path.join(
-            os.path.dirname(__file__),
-            "..",
-            "..",
-            "ml",
-            "models"
-        )
-        model_dir = os.path.abspath(model_dir)
-        os.makedirs(model_dir, exist_ok=True)
-
-        model_path = os.path.join(model_dir, "expense_nb.pkl")
-
-        with open(model_path, "wb") as f:
-            pickle.dump(model, f)
+        version = (model_version() or 0) + 1
+        publish_model((vectorizer, clf), version)
 
         self.stdout.write(
             self.style.SUCCESS(
-                f"Model trained and saved to {model_path}"
+                f"Model v{version} trained on {samples} samples and saved to {MODEL_PATH}"
             )
         )
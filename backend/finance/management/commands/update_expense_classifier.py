@@ -0,0 +1,89 @@
+from django.core.management.base import BaseCommand
+
+from finance.ml.inference import load_model, model_version, publish_model
+from finance.models import ClassifierFeedback
+
+DELETE_CHUNK = 500  # ids per DELETE, under SQLite's bound-parameter limit
+
+
+class Command(BaseCommand):
+    help = "Fold queued category corrections into the live model with partial_fit (run periodically)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=10000,
+            help="Examples fitted per partial_fit step",
+        )
+
+    def handle(self, *args, **options):
+        model = load_model()
+        if model is None:
+            self.stdout.write(
+                self.style.WARNING("No model to update; run train_expense_classifier first.")
+            )
+            return
+
+        vectorizer, clf = model
+        known = set(clf.classes_)
+        chunk_size = options["chunk_size"]
+
+        pending = (
+            ClassifierFeedback.objects
+            .order_by("id")
+            .values_list("id", "note", "category__name")
+        )
+
+        texts = []
+        labels = []
+        consumed = []
+        applied = 0
+        skipped = 0
+
+        def fit_chunk():
+            clf.partial_fit(vectorizer.transform(texts), labels)
+            texts.clear()
+            labels.clear()
+
+        for feedback_id, note, category_name in pending.iterator(chunk_size=chunk_size):
+            consumed.append(feedback_id)
+            label = category_name.lower()
+
+            # partial_fit cannot add classes; new categories wait for a full retrain
+            if label not in known:
+                skipped += 1
+                continue
+
+            texts.append(note)
+            labels.append(label)
+            applied += 1
+
+            if len(texts) >= chunk_size:
+                fit_chunk()
+
+        if texts:
+            fit_chunk()
+
+        if not consumed:
+            self.stdout.write("No queued feedback.")
+            return
+
+        version = model_version() or 0
+        if applied:
+            version += 1
+            publish_model((vectorizer, clf), version)
+
+        # Exactly the rows read above: one with a lower id that committed
+        # after the read was not trained on and stays queued
+        for start in range(0, len(consumed), DELETE_CHUNK):
+            ClassifierFeedback.objects.filter(
+                id__in=consumed[start:start + DELETE_CHUNK]
+            ).delete()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Applied {applied} examples ({skipped} with unknown categories skipped); "
+                f"model is at v{version}."
+            )
+        )
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("finance", "0006_categoryrunningstats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClassifierFeedback",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("note", models.CharField(max_length=255)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="classifier_feedback",
+                        to="finance.category",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("finance", "0008_monthlyaisummary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="monthlyaisummary",
+            name="generating_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
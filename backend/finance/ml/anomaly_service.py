@@ -1,24 +1,19 @@
 import os
-import pickle
 
-ANOMALY_STATS = None
+from finance.ml import running_stats
+from finance.ml.stats_store import StatsStore
 
+STATS_PATH = os.path.join(
+    os.path.dirname(__file__),
+    "models",
+    "anomaly_stats.bin"
+)
 
-def load_anomaly_stats():
-    global ANOMALY_STATS
+# |z| above this marks a transaction as anomalous (as in the Azure Function)
+ANOMALY_Z_THRESHOLD = 3.0
 
-    model_path = os.path.join(
-        os.path.dirname(__file__),
-        "models",
-        "anomaly_stats.pkl"
-    )
-
-    if not os.path.exists(model_path):
-        ANOMALY_STATS = {}
-        return
-
-    with open(model_path, "rb") as f:
-        ANOMALY_STATS = pickle.load(f)
+# Memory-mapped and shared by all workers; reloads when the file changes
+ANOMALY_STATS = StatsStore(STATS_PATH)
 
 
 def get_category_stats(user_id, category_id):
@@ -26,15 +21,15 @@ def get_category_stats(user_id, category_id):
     Returns:
         dict: {"mean": float, "std": float, "count": int}
         or None if not available
-    """
-    if ANOMALY_STATS is None:
-        load_anomaly_stats()
 
-    user_data = ANOMALY_STATS.get(user_id)
-    if not user_data:
-        return None
+    Prefers the running baselines kept current on every write and falls
+    back to the batch stats from compute_anomaly_stats.
+    """
+    stats = running_stats.get_baseline(user_id, category_id)
+    if stats:
+        return stats
 
-    return user_data.get(category_id)
+    return ANOMALY_STATS.lookup(user_id, category_id)
 
 def compute_z_score(user_id, category_id, amount):
     """
@@ -55,3 +50,43 @@ def compute_z_score(user_id, category_id, amount):
         return (float(amount) - mean) / std
     except Exception:
         return None
+
+
+def compute_z_scores(user_id, category_ids, amounts):
+    """
+    Vectorized compute_z_score for many transactions of one user.
+    Returns a list aligned with the inputs, with None where stats are unavailable.
+    """
+    import numpy as np
+
+    z_scores = z_score_array([user_id] * len(amounts), category_ids, amounts)
+    return [float(z) if np.isfinite(z) else None for z in z_scores]
+
+
+def z_score_array(user_ids, category_ids, amounts):
+    """
+    compute_z_score over aligned arrays of any users' transactions, with one
+    query for the running baselines and one join against the stats file.
+    Returns a float64 array, NaN where stats are unavailable.
+    """
+    import numpy as np
+
+    # Batch stats from the file, then the running baselines on top (they win,
+    # as in get_category_stats)
+    means, stds = ANOMALY_STATS.lookup_many(user_ids, category_ids)
+
+    pairs = list(zip(user_ids, category_ids))
+    running = running_stats.get_baselines(pairs)
+    if running:
+        for i, pair in enumerate(pairs):
+            stats = running.get(pair)
+            if stats:
+                means[i] = stats["mean"]
+                stds[i] = stats["std"]
+
+    values = np.asarray([float(a) for a in amounts], dtype=np.float64)
+    valid = np.isfinite(means) & np.isfinite(stds) & (stds != 0)
+
+    z_scores = np.full(len(values), np.nan)
+    z_scores[valid] = (values[valid] - means[valid]) / stds[valid]
+    return z_scores
@@ -0,0 +1,19 @@
+from finance.ml.inference import _clean_text
+from finance.models import ClassifierFeedback, Transaction
+
+
+def record_examples(transactions):
+    """
+    Queues (cleaned note, final category) for every expense with a usable note.
+    """
+    rows = []
+    for tx in transactions:
+        if tx.type != Transaction.TransactionType.EXPENSE or not tx.category_id:
+            continue
+
+        cleaned = _clean_text(tx.note or "")
+        if cleaned:
+            rows.append(ClassifierFeedback(note=cleaned[:255], category_id=tx.category_id))
+
+    if rows:
+        ClassifierFeedback.objects.bulk_create(rows, batch_size=1000)
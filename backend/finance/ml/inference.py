@@ -1,7 +1,10 @@
 import os
 import pickle
 import re
-from django.conf import settings
+import threading
+from collections import OrderedDict
+
+from finance.ml import registry
 
 MODEL_PATH = os.path.join(
     os.path.dirname(__file__),
@@ -9,7 +12,10 @@ MODEL_PATH = os.path.join(
     "expense_nb.pkl"
 )
 
-_model = None
+PREDICTION_CACHE_SIZE = 10000
+
+_NON_ALPHA_RE = re.compile(r"[^a-z\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
 
 
 def _clean_text(text: str) -> str:
@@ -18,36 +24,145 @@ def _clean_text(text: str) -> str:
     Keep this stable for train/infer parity.
     """
     text = text.lower()
-    text = re.sub(r"[^a-z\s]", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
+    text = _NON_ALPHA_RE.sub(" ", text)
+    text = _WHITESPACE_RE.sub(" ", text).strip()
     return text
 
 
+class PredictionCache:
+    """
+    Thread-safe LRU of cleaned note -> predicted label, with hit/miss counters.
+    Entries are only valid for the model that produced them.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._model = None
+        self._lock = threading.Lock()
+
+    def get_many(self, model, keys):
+        """
+        Returns {key: label} for the cached keys and counts hits/misses.
+        """
+        found = {}
+        with self._lock:
+            if model is not self._model:
+                self._data.clear()
+                self._model = model
+
+            for key in keys:
+                if key in self._data:
+                    self._data.move_to_end(key)
+                    found[key] = self._data[key]
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set_many(self, model, items):
+        with self._lock:
+            if model is not self._model:
+                return
+
+            for key, label in items:
+                self._data[key] = label
+                self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
+
+_prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE)
+
+
+def prediction_cache_info() -> dict:
+    return _prediction_cache.info()
+
+
+def _load_model_file(path):
+    """
+    Published models are {"version": int, "model": (vectorizer, classifier)};
+    a bare tuple is a legacy, unversioned file.
+    """
+    with open(path, "rb") as f:
+        payload = pickle.load(f)
+
+    if isinstance(payload, dict):
+        return payload["model"], payload["version"]
+    return payload, 0
+
+
+_model = registry.register("expense_classifier", MODEL_PATH, _load_model_file)
+
+
 def load_model():
-    global _model
-    if _model is not None:
-        return _model
+    """
+    Returns the (vectorizer, classifier) tuple, or None if none is trained.
+    A newly published version is picked up without a restart.
+    """
+    return _model.get()
 
-    if not os.path.exists(MODEL_PATH):
-        return None
 
-    with open(MODEL_PATH, "rb") as f:
-        _model = pickle.load(f)
+def model_version():
+    return _model.version if load_model() is not None else None
 
-    return _model
+
+def publish_model(model, version: int):
+    """
+    Atomically replaces the model file. Running workers pick the new
+    version up on their next load_model() call.
+    """
+    with registry.atomic_write(MODEL_PATH) as f:
+        pickle.dump({"version": version, "model": model}, f)
 
 
 def predict_category(note: str):
+    return predict_categories([note])[0]
+
+
+def predict_categories(notes: list) -> list:
+    """
+    Predicts a category label for every note. Cached notes are answered from
+    the LRU; the remaining distinct notes go through a single transform/predict
+    call. Returns None for notes that clean to nothing.
+    """
     model = load_model()
     if model is None:
-        return None
+        return [None] * len(notes)
+
+    cleaned = [_clean_text(note or "") for note in notes]
+    unique = list(dict.fromkeys(text for text in cleaned if text))
+
+    labels = _prediction_cache.get_many(model, unique)
+    missing = [text for text in unique if text not in labels]
+
+    if missing:
+        # model is expected to be a (vectorizer, classifier) tuple
+        vectorizer, clf = model
+
+        X = vectorizer.transform(missing)
+        predicted = [str(label) for label in clf.predict(X)]
 
-    cleaned = _clean_text(note)
-    if not cleaned:
-        return None
+        labels.update(zip(missing, predicted))
+        _prediction_cache.set_many(model, zip(missing, predicted))
 
-    # model is expected to be a (vectorizer, classifier) tuple
-    vectorizer, clf = model
+    return [labels.get(text) for text in cleaned]
 
-    X = vectorizer.transform([cleaned])
-    return clf.predict(X)[0]
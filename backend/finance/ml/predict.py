@@ -1,31 +1,19 @@
-import joblib
-from django.conf import settings
-from finance.models import Category
+from finance.ml.inference import predict_categories
+from finance.services.category_cache import get_category_ids_by_name
 
-MODEL_PATH = settings.BASE_DIR / "finance" / "ml" / "expense_classifier.pkl"
 
-_model = None
-_vectorizer = None
+def resolve_labels(user_id, labels: list) -> list:
+    """
+    Maps the model's lowercase labels to the user's Category ids.
+    Returns None where there is no label or the user has no such category.
+    """
+    by_name = get_category_ids_by_name(user_id)
+    return [by_name.get(label.lower()) if label else None for label in labels]
 
 
-def load_model():
-    global _model, _vectorizer
-    if _model is None:
-        data = joblib.load(MODEL_PATH)
-        _model = data["model"]
-        _vectorizer = data["vectorizer"]
-    return _model, _vectorizer
+def predict_category_ids(user_id, notes: list) -> list:
+    return resolve_labels(user_id, predict_categories(notes))
 
 
-def predict_category_from_note(user, note):
-    if not note:
-        return None
-
-    model, vectorizer = load_model()
-    X = vectorizer.transform([note])
-    predicted_name = model.predict(X)[0]
-
-    return Category.objects.filter(
-        user=user,
-        name__iexact=predicted_name
-    ).first()
+def predict_category_id(user_id, note: str):
+    return predict_category_ids(user_id, [note])[0]
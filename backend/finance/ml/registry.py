@@ -0,0 +1,179 @@
+"""
+Owns every ML artifact the workers serve from (classifier, anomaly stats).
+
+Each artifact is a file that is loaded lazily on first use and polled for
+changes at most once per RELOAD_CHECK_INTERVAL. Writers publish a new file
+with atomic_write (temp file + rename), so a reader opens either the old or
+the new file, never a partial one. The loaded state is swapped as a single
+reference: requests in flight keep the object they already hold, and a reload
+happening in one thread never blocks the others once a value is loaded.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+RELOAD_CHECK_INTERVAL = 1.0  # seconds between mtime checks
+
+
+@contextmanager
+def atomic_write(path):
+    """
+    Yields a binary file that replaces `path` in one rename when the block
+    exits cleanly. Nothing is left behind if it raises.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates 0600; workers may run as another user
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def estimate_nbytes(obj) -> int:
+    """
+    Approximate resident size of a loaded artifact: array buffers plus the
+    Python objects that hold them. Memory-mapped arrays count their mapping.
+    """
+    import numpy as np
+
+    seen = set()
+    stack = [obj]
+    total = 0
+
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+
+        if isinstance(item, np.ndarray):
+            total += item.nbytes
+            continue
+
+        total += sys.getsizeof(item)
+
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif hasattr(item, "__dict__"):
+            stack.append(vars(item))
+
+    return total
+
+
+class Artifact:
+    """
+    One file-backed artifact.
+
+    `loader(path)` returns (value, version). The version is whatever the file
+    records (the classifier's publish counter); loaders without one may return
+    None, and the file's mtime then stands in for it.
+    """
+
+    def __init__(self, name, path, loader):
+        self.name = name
+        self.path = path
+        self.loader = loader
+        self._lock = threading.Lock()
+        # (mtime_ns, value, version, stats) is swapped as one reference
+        self._state = (None, None, None, {})
+        self._next_check = 0.0
+        self.loads = 0
+
+    def get(self):
+        """
+        Returns the current value, or None while the file does not exist.
+        """
+        state = self._state
+        now = time.monotonic()
+        if state[1] is not None and now < self._next_check:
+            return state[1]
+
+        # Someone else is already checking: serve what we have
+        if not self._lock.acquire(blocking=state[1] is None):
+            return state[1]
+
+        try:
+            self._next_check = now + RELOAD_CHECK_INTERVAL
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                self._state = (None, None, None, {})
+                return None
+
+            if mtime != self._state[0]:
+                self._state = self._load(mtime)
+
+            return self._state[1]
+        finally:
+            self._lock.release()
+
+    def _load(self, mtime):
+        started = time.perf_counter()
+        value, version = self.loader(self.path)
+        load_seconds = time.perf_counter() - started
+
+        self.loads += 1
+        stats = {
+            "load_seconds": round(load_seconds, 4),
+            "loaded_at": time.time(),
+            "file_bytes": os.path.getsize(self.path),
+            "memory_bytes": estimate_nbytes(value),
+        }
+        return (mtime, value, version if version is not None else mtime, stats)
+
+    @property
+    def version(self):
+        self.get()
+        return self._state[2]
+
+    def info(self) -> dict:
+        _, value, version, stats = self._state
+        return {
+            "path": self.path,
+            "loaded": value is not None,
+            "version": version,
+            "loads": self.loads,
+            **stats,
+        }
+
+
+_artifacts = {}
+_artifacts_lock = threading.Lock()
+
+
+def register(name, path, loader) -> Artifact:
+    """
+    Declares an artifact. Nothing is read until the first get().
+    """
+    with _artifacts_lock:
+        artifact = _artifacts.get(name)
+        if artifact is None or artifact.path != path:
+            artifact = _artifacts[name] = Artifact(name, path, loader)
+        return artifact
+
+
+def get(name):
+    return _artifacts[name].get()
+
+
+def metrics() -> dict:
+    """
+    Returns {name: info} for every registered artifact, loaded or not.
+    """
+    return {name: artifact.info() for name, artifact in _artifacts.items()}
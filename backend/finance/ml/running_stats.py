@@ -0,0 +1,264 @@
+import math
+from collections import defaultdict
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+from django.db import IntegrityError, transaction
+from django.db.models import Count, FloatField, Q, Sum
+from django.db.models.functions import Cast, ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from finance.models import CategoryRunningStats, Transaction
+
+ALL_TIME = (0, 0)
+WINDOW_MONTHS = 3
+MIN_SAMPLES = 5
+
+EMPTY = (0, 0.0, 0.0)  # (count, mean, m2)
+
+
+# ---------- Welford / Chan arithmetic ----------
+
+def summarize(values) -> tuple:
+    """
+    Welford pass over a batch of values. Returns (count, mean, m2).
+    """
+    n, mean, m2 = 0, 0.0, 0.0
+    for x in values:
+        n += 1
+        delta = x - mean
+        mean += delta / n
+        m2 += delta * (x - mean)
+    return n, mean, m2
+
+
+def merge(a, b) -> tuple:
+    """
+    Combines the statistics of two disjoint samples (Chan et al.).
+    """
+    na, ma, m2a = a
+    nb, mb, m2b = b
+    if nb == 0:
+        return a
+    if na == 0:
+        return b
+
+    n = na + nb
+    delta = mb - ma
+    return n, ma + delta * nb / n, m2a + m2b + delta * delta * na * nb / n
+
+
+def subtract(total, part) -> tuple:
+    """
+    Inverse of merge: removes the sample `part` from `total`.
+    """
+    n, mean, m2 = total
+    nb, mb, m2b = part
+    if nb == 0:
+        return total
+
+    na = n - nb
+    if na <= 0:
+        return EMPTY
+
+    ma = (n * mean - nb * mb) / na
+    delta = mb - ma
+    return na, ma, max(m2 - m2b - delta * delta * na * nb / n, 0.0)
+
+
+# ---------- Incremental maintenance ----------
+
+def apply_changes(changes):
+    """
+    changes: iterable of (TransactionState, sign) pairs from rollup_service.
+
+    Every expense touches its month bucket and the all-time row. Additions
+    and removals for the same row are summarized first, so each row is read
+    and written once per call regardless of batch size.
+    """
+    added = defaultdict(list)
+    removed = defaultdict(list)
+
+    for state, sign in changes:
+        if state.type != Transaction.TransactionType.EXPENSE:
+            continue
+
+        amount = float(state.amount)
+        target = added if sign > 0 else removed
+        for year, month in ((state.date.year, state.date.month), ALL_TIME):
+            target[(state.user_id, state.category_id, year, month)].append(amount)
+
+    keys = set(added) | set(removed)
+    if not keys:
+        return
+
+    try:
+        _apply_summaries(keys, added, removed)
+    except IntegrityError:
+        # Lost a race with a concurrent writer creating one of the rows. It
+        # exists now, so the retry locks it and takes the update path.
+        _apply_summaries(keys, added, removed)
+
+
+def _apply_summaries(keys, added, removed):
+    match = Q()
+    for user_id, category_id, year, month in keys:
+        match |= Q(user_id=user_id, category_id=category_id, year=year, month=month)
+
+    with transaction.atomic():
+        existing = {
+            (row.user_id, row.category_id, row.year, row.month): row
+            for row in CategoryRunningStats.objects.select_for_update().filter(match)
+        }
+
+        now = timezone.now()
+        to_update = []
+        to_create = []
+
+        for key in keys:
+            row = existing.get(key)
+            current = (row.count, row.mean, row.m2) if row else EMPTY
+
+            n, mean, m2 = merge(
+                subtract(current, summarize(removed.get(key, ()))),
+                summarize(added.get(key, ())),
+            )
+
+            if row:
+                row.count, row.mean, row.m2 = n, mean, m2
+                # bulk_update skips auto_now
+                row.updated_at = now
+                to_update.append(row)
+            elif n:
+                user_id, category_id, year, month = key
+                to_create.append(CategoryRunningStats(
+                    user_id=user_id,
+                    category_id=category_id,
+                    year=year,
+                    month=month,
+                    count=n,
+                    mean=mean,
+                    m2=m2,
+                ))
+
+        CategoryRunningStats.objects.bulk_update(
+            to_update, ["count", "mean", "m2", "updated_at"]
+        )
+        CategoryRunningStats.objects.bulk_create(to_create)
+
+
+# ---------- Lookup ----------
+
+def get_baseline(user_id, category_id, today=None):
+    """
+    Returns:
+        dict: {"mean": float, "std": float, "count": int}
+        or None if there are too few samples.
+
+    Mirrors compute_anomaly_stats: the last WINDOW_MONTHS months when they hold
+    at least MIN_SAMPLES expenses, else all time. The window is made of whole
+    month buckets, so it starts on the first of the cutoff month.
+    """
+    return get_baselines([(user_id, category_id)], today).get((user_id, category_id))
+
+
+def get_baselines(pairs, today=None) -> dict:
+    """
+    get_baseline for many (user_id, category_id) pairs in one query.
+    Returns {pair: baseline}; pairs with too few samples are left out.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return {}
+
+    cutoff = (today or date.today()) - relativedelta(months=WINDOW_MONTHS)
+
+    # IN on both columns may fetch a few extra pairs; they are skipped below
+    rows = CategoryRunningStats.objects.filter(
+        Q(year=ALL_TIME[0], month=ALL_TIME[1])
+        | Q(year__gt=cutoff.year)
+        | Q(year=cutoff.year, month__gte=cutoff.month),
+        user_id__in={user_id for user_id, _ in pairs},
+        category_id__in={category_id for _, category_id in pairs},
+    ).values_list("user_id", "category_id", "year", "month", "count", "mean", "m2")
+
+    window = defaultdict(lambda: EMPTY)
+    all_time = defaultdict(lambda: EMPTY)
+    for user_id, category_id, year, month, n, mean, m2 in rows:
+        key = (user_id, category_id)
+        if key not in pairs:
+            continue
+        if (year, month) == ALL_TIME:
+            all_time[key] = (n, mean, m2)
+        else:
+            window[key] = merge(window[key], (n, mean, m2))
+
+    baselines = {}
+    for key in pairs:
+        n, mean, m2 = window[key] if window[key][0] >= MIN_SAMPLES else all_time[key]
+        if n < MIN_SAMPLES:
+            continue
+
+        std = math.sqrt(m2 / n)
+        if std == 0:
+            continue
+
+        baselines[key] = {"mean": mean, "std": std, "count": n}
+
+    return baselines
+
+
+# ---------- Rebuild ----------
+
+def rebuild_running_stats(user_id=None) -> int:
+    """
+    Recomputes every bucket from the Transaction table in one grouped query
+    and replaces the stored rows. Returns the number of rows written.
+    """
+    qs = Transaction.objects.filter(type=Transaction.TransactionType.EXPENSE)
+    if user_id is not None:
+        qs = qs.filter(user_id=user_id)
+
+    amount = Cast("amount", FloatField())
+    rows = (
+        qs
+        .annotate(year=ExtractYear("date"), month=ExtractMonth("date"))
+        .values("user_id", "category_id", "year", "month")
+        .annotate(n=Count("id"), s=Sum(amount), ss=Sum(amount * amount))
+        .order_by()
+        .values_list("user_id", "category_id", "year", "month", "n", "s", "ss")
+    )
+
+    buckets = {}
+    all_time = defaultdict(lambda: EMPTY)
+
+    for user, category_id, year, month, n, s, ss in rows.iterator(chunk_size=5000):
+        mean = s / n
+        stats = (n, mean, max(ss - s * mean, 0.0))
+        buckets[(user, category_id, year, month)] = stats
+        all_time[(user, category_id)] = merge(all_time[(user, category_id)], stats)
+
+    for (user, category_id), stats in all_time.items():
+        buckets[(user, category_id) + ALL_TIME] = stats
+
+    objs = [
+        CategoryRunningStats(
+            user_id=user,
+            category_id=category_id,
+            year=year,
+            month=month,
+            count=n,
+            mean=mean,
+            m2=m2,
+        )
+        for (user, category_id, year, month), (n, mean, m2) in buckets.items()
+    ]
+
+    with transaction.atomic():
+        existing = CategoryRunningStats.objects.all()
+        if user_id is not None:
+            existing = existing.filter(user_id=user_id)
+        existing.delete()
+        CategoryRunningStats.objects.bulk_create(objs, batch_size=1000)
+
+    return len(objs)
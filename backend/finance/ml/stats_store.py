@@ -0,0 +1,186 @@
+"""
+Columnar, memory-mapped store for per-(user, category) anomaly baselines.
+
+File layout (little-endian, every section 8-byte aligned):
+
+    header   b"ANST" | uint32 version | uint64 n
+    user_id      int64[n]   sorted ascending
+    category_id  int64[n]   sorted ascending within each user
+    mean         float64[n]
+    std          float64[n]
+    count        int64[n]
+
+Workers map the file read-only, so they all share one copy through the page
+cache. Lookups are two binary searches. Publishing and reloading go through
+finance.ml.registry like every other ML artifact.
+"""
+import struct
+
+from finance.ml import registry
+
+MAGIC = b"ANST"
+VERSION = 1
+HEADER = struct.Struct("<4sIQ")
+
+# NumPy dtype strings; numpy itself is imported on first use (see _numpy)
+COLUMNS = [
+    ("user_id", "<i8"),
+    ("category_id", "<i8"),
+    ("mean", "<f8"),
+    ("std", "<f8"),
+    ("count", "<i8"),
+]
+
+
+_np = None
+
+
+def _numpy():
+    """
+    numpy, imported once on first use: it stays off Django's startup path
+    without an import statement in every lookup.
+    """
+    global _np
+    if _np is None:
+        import numpy
+
+        _np = numpy
+    return _np
+
+
+def write_stats(path, stats: dict):
+    """
+    Atomically writes {user_id: {category_id: {"mean", "std", "count"}}} to `path`.
+    """
+    np = _numpy()
+
+    rows = sorted(
+        (user_id, category_id, values["mean"], values["std"], values["count"])
+        for user_id, categories in stats.items()
+        for category_id, values in categories.items()
+    )
+
+    with registry.atomic_write(path) as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(rows)))
+        for i, (_, dtype) in enumerate(COLUMNS):
+            f.write(np.array([row[i] for row in rows], dtype=dtype).tobytes())
+
+
+def map_stats(path) -> dict:
+    """
+    Memory-maps a stats file. Returns {column name: read-only array}.
+    """
+    np = _numpy()
+
+    with open(path, "rb") as f:
+        magic, version, n = HEADER.unpack(f.read(HEADER.size))
+
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not an anomaly stats file (version {VERSION})")
+
+    columns = {}
+    offset = HEADER.size
+    for name, dtype in COLUMNS:
+        if n:
+            columns[name] = np.memmap(
+                path, dtype=dtype, mode="r",
+                offset=offset, shape=(n,)
+            )
+        else:
+            columns[name] = np.empty(0, dtype=dtype)
+        offset += n * 8
+
+    return columns
+
+
+def iter_stats(path):
+    """
+    Yields (user_id, category_id, mean, std, count) rows in key order.
+    """
+    columns = map_stats(path)
+    yield from zip(*(columns[name].tolist() for name, _ in COLUMNS))
+
+
+def _load_stats_file(path):
+    # The file has no publish counter; the registry versions it by mtime
+    return map_stats(path), None
+
+
+class StatsStore:
+    """
+    Read side of a stats file, mapped on first lookup and reloaded when the
+    file changes.
+    """
+
+    def __init__(self, path, name="anomaly_stats"):
+        self.path = path
+        self._artifact = registry.register(name, path, _load_stats_file)
+        # (columns, sorted user_id << 32 | category_id) for lookup_many
+        self._pair_keys = (None, None)
+
+    def _current(self):
+        return self._artifact.get()
+
+    def lookup(self, user_id, category_id):
+        """
+        Returns:
+            dict: {"mean": float, "std": float, "count": int}
+            or None if the pair is not in the file.
+        """
+        columns = self._current()
+        if columns is None:
+            return None
+
+        users = columns["user_id"]
+        lo = int(users.searchsorted(user_id, side="left"))
+        hi = int(users.searchsorted(user_id, side="right"))
+        if lo == hi:
+            return None
+
+        i = lo + int(columns["category_id"][lo:hi].searchsorted(category_id))
+        if i >= hi or columns["category_id"][i] != category_id:
+            return None
+
+        return {
+            "mean": float(columns["mean"][i]),
+            "std": float(columns["std"][i]),
+            "count": int(columns["count"][i]),
+        }
+
+    def lookup_many(self, user_ids, category_ids):
+        """
+        Vectorized lookup for aligned id arrays.
+
+        Returns:
+            (mean, std): float64 arrays aligned with the inputs,
+            NaN where the pair is not in the file.
+        """
+        np = _numpy()
+
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        category_ids = np.asarray(category_ids, dtype=np.int64)
+        means = np.full(len(user_ids), np.nan)
+        stds = np.full(len(user_ids), np.nan)
+
+        columns = self._current()
+        if columns is None or not len(columns["user_id"]):
+            return means, stds
+
+        # Rows are sorted by (user, category), so one packed key per row is
+        # sorted too and a single searchsorted joins the whole batch
+        cached, keys = self._pair_keys
+        if cached is not columns:
+            keys = (columns["user_id"] << 32) | columns["category_id"]
+            self._pair_keys = (columns, keys)
+
+        wanted = (user_ids << 32) | category_ids
+        i = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+        found = keys[i] == wanted
+
+        means[found] = columns["mean"][i[found]]
+        stds[found] = columns["std"][i[found]]
+        return means, stds
+
+    def __len__(self):
+        columns = self._current()
+        return 0 if columns is None else len(columns["user_id"])
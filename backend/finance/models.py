@@ -70,6 +70,18 @@ class Transaction(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Hot access paths: per-user listing / month ranges, per-type month
+        # totals, and per-category baselines (anomaly stats, breakdowns).
+        indexes = [
+            models.Index(fields=['user', 'date'], name='txn_user_date_idx'),
+            models.Index(fields=['user', 'type', 'date'], name='txn_user_type_date_idx'),
+            models.Index(
+                fields=['user', 'category', 'type', 'date'],
+                name='txn_user_cat_type_date_idx'
+            ),
+        ]
+
 class MonthlySummary(models.Model):
     user = models.ForeignKey(
         User,
@@ -103,3 +115,125 @@ class MonthlySummary(models.Model):
 
     class Meta:
         unique_together = ('user', 'year', 'month')
+
+
+class CategoryMonthlySpending(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='category_monthly_spending'
+    )
+
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='monthly_spending'
+    )
+
+    year = models.IntegerField()
+    month = models.IntegerField()  # 1–12
+
+    total_expense = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0
+    )
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'year', 'month', 'category')
+
+
+class CategoryRunningStats(models.Model):
+    """
+    Welford running statistics (count, mean, M2) of expense amounts for one
+    (user, category). There is one row per calendar month, so a sliding window
+    is a merge of a few buckets, plus an all-time row stored at year=0, month=0.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='category_running_stats'
+    )
+
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='running_stats'
+    )
+
+    year = models.IntegerField()
+    month = models.IntegerField()  # 1–12, or 0 for the all-time row
+
+    count = models.IntegerField(default=0)
+    mean = models.FloatField(default=0)
+    m2 = models.FloatField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'category', 'year', 'month')
+
+
+class MonthlyAISummary(models.Model):
+    """
+    Generated AI monthly summaries, written on demand by the AI endpoints
+    and ahead of time by pregenerate_summaries. A row is only served while
+    its fingerprint matches the month's current inputs.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='ai_summaries'
+    )
+
+    year = models.IntegerField()
+    month = models.IntegerField()  # 1–12
+
+    fingerprint = models.CharField(max_length=64)
+    summary = models.TextField()
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'year', 'month')
+
+
+class MonthlyAISummaryLease(models.Model):
+    """
+    Held by the worker generating a user-month's AI summary, so other
+    workers serve its result instead of calling the LLM too. Expires on its
+    own if the holder dies.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='ai_summary_leases'
+    )
+
+    year = models.IntegerField()
+    month = models.IntegerField()  # 1–12
+
+    fingerprint = models.CharField(max_length=64)  # inputs being summarized
+    token = models.CharField(max_length=32)  # identifies the holder
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'year', 'month')
+
+
+class ClassifierFeedback(models.Model):
+    """
+    Queue of (cleaned note, final category) examples from creates and user
+    overrides, folded into the category model by update_expense_classifier.
+    """
+    note = models.CharField(max_length=255)
+
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='classifier_feedback'
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,92 @@
+import base64
+from datetime import date
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class TransactionCursorPagination(BasePagination):
+    """
+    Keyset pagination over (date, id), newest first.
+
+    The cursor encodes the (date, id) of the last row on the page, so every
+    page is a `WHERE (date, id) < cursor ORDER BY date DESC, id DESC LIMIT n`
+    range scan on the (user, date) index, no matter how deep the client goes.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = 50
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            last_date, last_id = position
+            queryset = queryset.filter(
+                Q(date__lt=last_date) | Q(date=last_date, id__lt=last_id)
+            )
+
+        # Fetch one extra row to know whether another page exists
+        rows = list(queryset.order_by("-date", "-id")[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        self.next_position = (rows[-1].date, rows[-1].id) if self.has_next else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        return min(max(size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode("ascii")).decode("ascii")
+            last_date, last_id = raw.split(":")
+            return date.fromisoformat(last_date), int(last_id)
+        except (ValueError, UnicodeError):
+            raise NotFound("Invalid cursor")
+
+    def encode_cursor(self, position):
+        last_date, last_id = position
+        raw = f"{last_date.isoformat()}:{last_id}"
+        return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii")
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.next_position)
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
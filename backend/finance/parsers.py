@@ -0,0 +1,33 @@
+import csv
+import io
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+def read_csv_rows(text: str) -> list:
+    """
+    Parses CSV text with a header row into a list of dicts.
+    """
+    reader = csv.DictReader(io.StringIO(text.lstrip("\ufeff")))
+    return [
+        {key.strip(): (value or "").strip() for key, value in row.items() if key}
+        for row in reader
+    ]
+
+
+class CSVParser(BaseParser):
+    """
+    Parses a `text/csv` request body into a list of row dicts.
+    """
+    media_type = "text/csv"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        try:
+            return read_csv_rows(stream.read().decode(encoding))
+        except (UnicodeDecodeError, csv.Error) as exc:
+            raise ParseError(f"CSV parse error - {exc}")
@@ -1,8 +1,13 @@
 from rest_framework import serializers
 from .models import Transaction
 from .models import Category
+from .ml.predict import predict_category_id
+from .ml.feedback import record_examples
 
 class TransactionSerializer(serializers.ModelSerializer):
+    """
+    Accepts an optional `fields` kwarg to serialize only a subset of fields.
+    """
     predicted_category = serializers.PrimaryKeyRelatedField(
         read_only=True
     )
@@ -22,17 +27,37 @@ class TransactionSerializer(serializers.ModelSerializer):
             'note',
             'anomaly_z_score',
         ]
+        extra_kwargs = {
+            'category': {'required': False},
+        }
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
     def create(self, validated_data):
         """
+        Predicts a category from the note (cached per-user name → id map,
+        no lookup query).
         If user provides category → keep it as final.
         Else → assign predicted category.
         """
-        transaction = super().create(validated_data)
+        user = validated_data["user"]
+        predicted_id = predict_category_id(user.id, validated_data.get("note", ""))
+        validated_data["predicted_category_id"] = predicted_id
 
-        if not transaction.category and transaction.predicted_category:
-            transaction.category = transaction.predicted_category
-            transaction.save(update_fields=["category"])
+        if not validated_data.get("category"):
+            if predicted_id is None:
+                raise serializers.ValidationError(
+                    {"category": ["Category is required when it cannot be predicted."]}
+                )
+            validated_data["category_id"] = predicted_id
+
+        transaction = super().create(validated_data)
+        record_examples([transaction])
 
         return transaction
 
@@ -40,11 +65,14 @@ class TransactionSerializer(serializers.ModelSerializer):
         """
         If user updates category → it overrides prediction.
         """
+        old_category_id = instance.category_id
         transaction = super().update(instance, validated_data)
 
         if transaction.category:
-            # User override: keep predicted as reference only
-            pass
+            # User override: keep predicted as reference only, and queue
+            # the correction for the next incremental model update
+            if transaction.category_id != old_category_id:
+                record_examples([transaction])
         elif transaction.predicted_category:
             transaction.category = transaction.predicted_category
             transaction.save(update_fields=["category"])
@@ -59,6 +87,69 @@ class CategorySerializer(serializers.ModelSerializer):
         model = Category
         fields = ['id', 'name']
 
+class DashboardQuerySerializer(serializers.Serializer):
+    year = serializers.IntegerField(min_value=2000, max_value=2100)
+    month = serializers.IntegerField(min_value=1, max_value=12)
+    recent = serializers.IntegerField(min_value=0, max_value=50, default=10)
+
+
+class TransactionFilterSerializer(serializers.Serializer):
+    """
+    Query params accepted by the transactions list endpoint.
+    """
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    type = serializers.ChoiceField(
+        choices=Transaction.TransactionType.choices,
+        required=False
+    )
+    category = serializers.IntegerField(required=False)
+    fields = serializers.CharField(required=False)
+
+    def validate_fields(self, value):
+        requested = [f.strip() for f in value.split(",") if f.strip()]
+        unknown = set(requested) - set(TransactionSerializer.Meta.fields)
+
+        # An empty projection would render every row as {}
+        if not requested:
+            raise serializers.ValidationError("List at least one field.")
+        if unknown:
+            raise serializers.ValidationError(
+                f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+        return requested
+
+    def validate(self, attrs):
+        date_from = attrs.get("date_from")
+        date_to = attrs.get("date_to")
+
+        if date_from and date_to and date_from > date_to:
+            raise serializers.ValidationError("`date_from` must be before `date_to`.")
+        return attrs
+
+class TransactionImportRowSerializer(serializers.Serializer):
+    """
+    One row of a bulk import. `category` is a category id or name;
+    leave it blank to use the ML prediction for the note.
+    """
+    type = serializers.ChoiceField(choices=Transaction.TransactionType.choices)
+    category = serializers.CharField(required=False, allow_blank=True)
+    amount = serializers.DecimalField(max_digits=8, decimal_places=2)
+    date = serializers.DateField()
+    note = serializers.CharField(
+        max_length=255,
+        required=False,
+        allow_blank=True,
+        default=""
+    )
+
+class PredictCategoryBatchSerializer(serializers.Serializer):
+    notes = serializers.ListField(
+        child=serializers.CharField(allow_blank=True, max_length=255, trim_whitespace=True),
+        allow_empty=False,
+        max_length=500
+    )
+
 class MonthlyAISummaryRequestSerializer(serializers.Serializer):
     year = serializers.IntegerField(min_value=2000, max_value=2100)
     month = serializers.IntegerField(min_value=1, max_value=12)
@@ -0,0 +1,219 @@
+"""
+Cache of generated AI monthly summaries.
+
+Summaries are kept in the MonthlyAISummary table, with the Django cache in
+front of it. One entry per (user, year, month) holds the summary together with a
+fingerprint of everything the prompt was built from: the rollup totals,
+the category breakdown and the prompt version. A lookup only hits when the
+fingerprint still matches, so a stale entry can never be served even if an
+invalidation is missed; transaction writes also drop the entry right away.
+
+The "ai_summaries" cache alias is local memory by default and the file
+backend when AI_SUMMARY_CACHE_DIR is set, so no Redis is needed.
+
+Concurrent requests for the same month and inputs make one LLM call:
+they are coalesced within the process, and across workers the one
+generating holds a MonthlyAISummaryLease row for the month. The lease is
+in the database, so it works with the default local memory cache too.
+Streaming requests wait for the holder's result without holding a
+thread; plain requests get SummaryInProgress instead of parking a worker.
+A lease held for other inputs is taken over right away, since the
+holder's summary would not match.
+"""
+import asyncio
+import hashlib
+import json
+import secrets
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from finance.models import MonthlyAISummary, MonthlyAISummaryLease
+from finance.services.single_flight import AsyncSingleFlight, SingleFlight
+
+CACHE_ALIAS = "ai_summaries"
+LEASE_POLL_INTERVAL = 0.25  # seconds between checks while another worker generates
+
+_flights = SingleFlight()
+async_flights = AsyncSingleFlight()
+
+
+class SummaryInProgress(Exception):
+    """
+    Another worker is generating this summary from the same inputs.
+    """
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def cache_key(user_id, year, month) -> str:
+    return f"ai-summary:{user_id}:{year}:{month}"
+
+
+def fingerprint(prompt_version, *inputs) -> str:
+    payload = json.dumps([prompt_version, *inputs], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get_cached(user_id, year, month, data_fingerprint):
+    """
+    Returns the cached summary if it was generated from the same inputs.
+    """
+    key = cache_key(user_id, year, month)
+    cached = _cache().get(key)
+    if cached and cached["fingerprint"] == data_fingerprint:
+        return cached["summary"]
+
+    summary = (
+        MonthlyAISummary.objects
+        .filter(user_id=user_id, year=year, month=month, fingerprint=data_fingerprint)
+        .values_list("summary", flat=True)
+        .first()
+    )
+    if summary is not None:
+        _cache().set(key, {"fingerprint": data_fingerprint, "summary": summary})
+    return summary
+
+
+def store(user_id, year, month, data_fingerprint, summary):
+    MonthlyAISummary.objects.update_or_create(
+        user_id=user_id,
+        year=year,
+        month=month,
+        defaults={"fingerprint": data_fingerprint, "summary": summary},
+    )
+    _cache().set(
+        cache_key(user_id, year, month),
+        {"fingerprint": data_fingerprint, "summary": summary},
+    )
+
+
+def flight_key(user_id, year, month, data_fingerprint) -> str:
+    return f"{cache_key(user_id, year, month)}:{data_fingerprint}"
+
+
+def _take_over(user_id, year, month, data_fingerprint, token) -> bool:
+    now = timezone.now()
+    return bool(
+        MonthlyAISummaryLease.objects
+        .filter(user_id=user_id, year=year, month=month)
+        .filter(Q(expires_at__lte=now) | ~Q(fingerprint=data_fingerprint))
+        .update(
+            fingerprint=data_fingerprint,
+            token=token,
+            expires_at=now + timedelta(seconds=settings.AI_SUMMARY_LOCK_TIMEOUT),
+        )
+    )
+
+
+def claim_lease(user_id, year, month, data_fingerprint):
+    """
+    Returns a token when the caller now holds the user-month's lease, or
+    None while another worker generates a summary from the same inputs.
+    """
+    token = secrets.token_hex(16)
+    if _take_over(user_id, year, month, data_fingerprint, token):
+        return token
+
+    try:
+        with transaction.atomic():
+            MonthlyAISummaryLease.objects.create(
+                user_id=user_id,
+                year=year,
+                month=month,
+                fingerprint=data_fingerprint,
+                token=token,
+                expires_at=timezone.now() + timedelta(seconds=settings.AI_SUMMARY_LOCK_TIMEOUT),
+            )
+        return token
+    except IntegrityError:
+        # Held, or created by a concurrent claim; it may be for other inputs
+        return token if _take_over(user_id, year, month, data_fingerprint, token) else None
+
+
+def release_lease(user_id, year, month, token):
+    # Only our own: the lease may have expired and been taken over
+    MonthlyAISummaryLease.objects.filter(
+        user_id=user_id, year=year, month=month, token=token
+    ).delete()
+
+
+def _try_lead(user_id, year, month, data_fingerprint):
+    """
+    Returns (summary, token): the stored summary for these inputs, or the
+    lease token when the caller should generate it, or (None, None) while
+    another worker does.
+    """
+    token = claim_lease(user_id, year, month, data_fingerprint)
+
+    # Checked after claiming: the holder may have just stored it
+    summary = get_cached(user_id, year, month, data_fingerprint)
+    if summary is not None and token is not None:
+        release_lease(user_id, year, month, token)
+        token = None
+    return summary, token
+
+
+async def async_acquire(user_id, year, month, data_fingerprint):
+    """
+    For streaming requests: waits (on the event loop, holding no thread)
+    while another worker generates the same summary.
+
+    Returns (summary, token) as _try_lead does; (None, None) once
+    AI_SUMMARY_LOCK_TIMEOUT passed, and the caller proceeds unlocked.
+    """
+    deadline = time.monotonic() + settings.AI_SUMMARY_LOCK_TIMEOUT
+    while True:
+        summary, token = await sync_to_async(_try_lead)(
+            user_id, year, month, data_fingerprint
+        )
+        if summary is not None or token is not None or time.monotonic() >= deadline:
+            return summary, token
+        await asyncio.sleep(LEASE_POLL_INTERVAL)
+
+
+def get_or_generate(user_id, year, month, data_fingerprint, generate):
+    """
+    Returns the cached summary when it was generated from the same inputs,
+    otherwise calls generate() (once across concurrent callers) and stores
+    its result.
+
+    Raises SummaryInProgress when another worker is already generating it:
+    a sync worker does not wait for the LLM on someone else's behalf.
+    """
+    summary = get_cached(user_id, year, month, data_fingerprint)
+    if summary is not None:
+        return summary
+
+    key = flight_key(user_id, year, month, data_fingerprint)
+
+    def lead():
+        summary, token = _try_lead(user_id, year, month, data_fingerprint)
+        if summary is not None:
+            return summary
+        if token is None:
+            raise SummaryInProgress()
+
+        try:
+            summary = generate()
+            store(user_id, year, month, data_fingerprint, summary)
+            return summary
+        finally:
+            release_lease(user_id, year, month, token)
+
+    return _flights.do(key, lead)
+
+
+def invalidate_months(keys):
+    """
+    keys: iterable of (user_id, year, month).
+    """
+    _cache().delete_many([cache_key(*key) for key in keys])
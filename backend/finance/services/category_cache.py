@@ -0,0 +1,60 @@
+import threading
+import time
+
+from django.core.cache import cache
+
+from finance.models import Category
+
+# finance.signals bumps a per-user stamp in the Django cache whenever a
+# category is saved or deleted; a cached map built under an older stamp is
+# reloaded. Workers sharing the default cache (Redis, memcached, file) see
+# each other's bumps; with the per-process LocMem default, other workers
+# pick changes up after the TTL.
+CACHE_TTL = 60  # seconds
+
+_cache = {}  # user_id -> (expires_at, stamp, {lowercase name: category id})
+_lock = threading.Lock()
+
+
+def _stamp_key(user_id) -> str:
+    return f"category-map-stamp:{user_id}"
+
+
+def get_category_ids_by_name(user_id) -> dict:
+    """
+    Returns {lowercase category name: category id} for a user,
+    cached in-process so predictions need no lookup query.
+    """
+    now = time.monotonic()
+    stamp = cache.get(_stamp_key(user_id), 0)
+
+    entry = _cache.get(user_id)
+    if entry is not None and entry[0] > now and entry[1] == stamp:
+        return entry[2]
+
+    mapping = {
+        name.lower(): category_id
+        for category_id, name in Category.objects.filter(user_id=user_id).values_list("id", "name")
+    }
+
+    with _lock:
+        _cache[user_id] = (now + CACHE_TTL, stamp, mapping)
+
+    return mapping
+
+
+def invalidate(user_id):
+    """
+    Marks the user's map stale in every process sharing the cache.
+    """
+    key = _stamp_key(user_id)
+    if not cache.add(key, 1, timeout=None):
+        cache.incr(key)
+
+    with _lock:
+        _cache.pop(user_id, None)
+
+
+def clear():
+    with _lock:
+        _cache.clear()
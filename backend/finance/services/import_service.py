@@ -0,0 +1,74 @@
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from finance.ml.anomaly_service import compute_z_scores
+from finance.ml.feedback import record_examples
+from finance.ml.predict import predict_category_ids
+from finance.models import Transaction
+from finance.services import rollup_service
+from finance.services.category_cache import get_category_ids_by_name
+
+MAX_IMPORT_ROWS = 5000
+
+
+def import_transactions(user, rows: list) -> list:
+    """
+    Creates many transactions for one user in a single database transaction.
+
+    rows: validated TransactionImportRowSerializer data. `category` may be a
+    category id, a category name, or blank to use the ML prediction.
+
+    Categories are resolved from the cached per-user name map, predictions
+    and z-scores are computed for the whole batch at once, and rows are
+    written with bulk_create.
+    """
+    by_name = get_category_ids_by_name(user.id)
+    by_id = {str(cat_id): cat_id for cat_id in by_name.values()}
+
+    predicted_ids = predict_category_ids(user.id, [row.get("note", "") for row in rows])
+
+    objs = []
+    errors = {}
+
+    for i, (row, predicted_id) in enumerate(zip(rows, predicted_ids)):
+        given = (row.get("category") or "").strip()
+        if given:
+            category_id = by_id.get(given) or by_name.get(given.lower())
+            if category_id is None:
+                errors[i] = {"category": [f"Unknown category '{given}'."]}
+                continue
+        else:
+            category_id = predicted_id
+            if category_id is None:
+                errors[i] = {"category": ["Category is required when it cannot be predicted."]}
+                continue
+
+        objs.append(Transaction(
+            user=user,
+            type=row["type"],
+            category_id=category_id,
+            predicted_category_id=predicted_id,
+            amount=row["amount"],
+            date=row["date"],
+            note=row.get("note", ""),
+        ))
+
+    if errors:
+        raise ValidationError({"rows": errors})
+
+    # Only expenses are scored, matching TransactionListCreateView.perform_create
+    expenses = [tx for tx in objs if tx.type == Transaction.TransactionType.EXPENSE]
+    z_scores = compute_z_scores(
+        user.id,
+        [tx.category_id for tx in expenses],
+        [tx.amount for tx in expenses],
+    )
+    for tx, z_score in zip(expenses, z_scores):
+        tx.anomaly_z_score = z_score
+
+    with transaction.atomic():
+        created = Transaction.objects.bulk_create(objs, batch_size=1000)
+        rollup_service.transactions_created(created)
+        record_examples(created)
+
+    return created
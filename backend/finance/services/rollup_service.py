@@ -0,0 +1,321 @@
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from finance.ml import running_stats
+from finance.services import ai_summary_cache
+from finance.models import CategoryMonthlySpending, MonthlySummary, Transaction
+
+ZERO = Decimal("0.00")
+TOUCH_CHUNK = 500  # user ids per UPDATE, under SQLite's bound-parameter limit
+
+
+def _money(value) -> Decimal:
+    # SQLite sums decimals as floats; round back to the column's 2 places
+    return Decimal(value or 0).quantize(ZERO)
+
+# The fields of a transaction that feed the rollups. Views take a snapshot
+# before an update/delete so the old contribution can be reversed.
+TransactionState = namedtuple(
+    "TransactionState",
+    ["user_id", "type", "category_id", "amount", "date"],
+)
+
+
+def snapshot(tx) -> TransactionState:
+    return TransactionState(
+        user_id=tx.user_id,
+        type=tx.type,
+        category_id=tx.category_id,
+        amount=Decimal(tx.amount),
+        date=tx.date,
+    )
+
+
+# ---------- Incremental maintenance ----------
+
+def transaction_created(tx):
+    _apply([(snapshot(tx), 1)])
+
+
+def transactions_created(txs):
+    _apply([(snapshot(tx), 1) for tx in txs])
+
+
+def transaction_updated(old: TransactionState, tx):
+    new = snapshot(tx)
+    if old == new:
+        # Totals are unchanged, but the dashboard lists the edited row
+        touch_monthly_summaries([new.user_id], new.date.year, new.date.month)
+        return
+    _apply([(old, -1), (new, 1)])
+
+
+def transaction_deleted(old: TransactionState):
+    _apply([(old, -1)])
+
+
+def _apply(changes):
+    """
+    changes: iterable of (TransactionState, sign) pairs.
+    Deltas for the same row are merged so an in-month edit is one UPDATE.
+    """
+    changes = list(changes)
+    monthly = defaultdict(lambda: [ZERO, ZERO])  # key -> [income, expense]
+    by_category = defaultdict(lambda: ZERO)  # key -> expense
+
+    for state, sign in changes:
+        key = (state.user_id, state.date.year, state.date.month)
+        amount = state.amount * sign
+        if state.type == Transaction.TransactionType.INCOME:
+            monthly[key][0] += amount
+        else:
+            monthly[key][1] += amount
+            by_category[key + (state.category_id,)] += amount
+
+    with transaction.atomic():
+        for (user_id, year, month), (income, expense) in monthly.items():
+            if income or expense:
+                _apply_monthly_delta(user_id, year, month, income, expense)
+            else:
+                # e.g. a category change: same totals, different breakdown
+                touch_monthly_summaries([user_id], year, month)
+
+        for (user_id, year, month, category_id), expense in by_category.items():
+            if expense:
+                _apply_category_delta(user_id, year, month, category_id, expense)
+
+        # Anomaly baselines follow the same writes
+        running_stats.apply_changes(changes)
+
+    ai_summary_cache.invalidate_months(monthly)
+
+
+def touch_monthly_summaries(user_ids, year=None, month=None):
+    """
+    Bumps MonthlySummary.updated_at, the dashboard's ETag version, after
+    writes that change what a month shows without changing its totals.
+    Every month of the users, or one month when year/month are given.
+    """
+    user_ids = list(user_ids)
+    now = timezone.now()
+
+    for start in range(0, len(user_ids), TOUCH_CHUNK):
+        qs = MonthlySummary.objects.filter(user_id__in=user_ids[start:start + TOUCH_CHUNK])
+        if year is not None:
+            qs = qs.filter(year=year, month=month)
+        qs.update(updated_at=now)
+
+
+def _apply_monthly_delta(user_id, year, month, income, expense):
+    updated = MonthlySummary.objects.filter(
+        user_id=user_id, year=year, month=month
+    ).update(
+        total_income=F("total_income") + income,
+        total_expense=F("total_expense") + expense,
+        savings=F("savings") + (income - expense),
+        updated_at=timezone.now(),
+    )
+    if updated:
+        return
+
+    try:
+        with transaction.atomic():
+            MonthlySummary.objects.create(
+                user_id=user_id,
+                year=year,
+                month=month,
+                total_income=income,
+                total_expense=expense,
+                savings=income - expense,
+            )
+    except IntegrityError:
+        # Lost a race with a concurrent writer creating the same row
+        _apply_monthly_delta(user_id, year, month, income, expense)
+
+
+def _apply_category_delta(user_id, year, month, category_id, expense):
+    updated = CategoryMonthlySpending.objects.filter(
+        user_id=user_id, year=year, month=month, category_id=category_id
+    ).update(
+        total_expense=F("total_expense") + expense,
+        updated_at=timezone.now(),
+    )
+    if updated:
+        return
+
+    try:
+        with transaction.atomic():
+            CategoryMonthlySpending.objects.create(
+                user_id=user_id,
+                year=year,
+                month=month,
+                category_id=category_id,
+                total_expense=expense,
+            )
+    except IntegrityError:
+        _apply_category_delta(user_id, year, month, category_id, expense)
+
+
+# ---------- Rebuild / consistency ----------
+
+def compute_monthly_totals(user_id=None) -> dict:
+    """
+    Recomputes monthly totals from the raw Transaction table in one grouped query.
+
+    Returns:
+        dict: {(user_id, year, month): (income, expense)}
+    """
+    qs = Transaction.objects.all()
+    if user_id is not None:
+        qs = qs.filter(user_id=user_id)
+
+    rows = (
+        qs
+        .annotate(year=ExtractYear("date"), month=ExtractMonth("date"))
+        .values("user_id", "year", "month")
+        .annotate(
+            income=Sum("amount", filter=Q(type=Transaction.TransactionType.INCOME)),
+            expense=Sum("amount", filter=Q(type=Transaction.TransactionType.EXPENSE)),
+        )
+        .order_by()
+    )
+
+    return {
+        (r["user_id"], r["year"], r["month"]): (_money(r["income"]), _money(r["expense"]))
+        for r in rows
+    }
+
+
+def _stored_monthly_totals(user_id=None) -> dict:
+    qs = MonthlySummary.objects.all()
+    if user_id is not None:
+        qs = qs.filter(user_id=user_id)
+
+    return {
+        (r["user_id"], r["year"], r["month"]): (r["total_income"], r["total_expense"], r["savings"])
+        for r in qs.values("user_id", "year", "month", "total_income", "total_expense", "savings")
+    }
+
+
+def find_monthly_summary_drift(user_id=None) -> list:
+    """
+    Compares MonthlySummary rows against the raw transactions.
+
+    Returns:
+        list of dicts describing every (user, year, month) that disagrees.
+    """
+    expected = compute_monthly_totals(user_id)
+    stored = _stored_monthly_totals(user_id)
+
+    drift = []
+    for key in sorted(set(expected) | set(stored)):
+        income, expense = expected.get(key, (ZERO, ZERO))
+        row = stored.get(key)
+
+        if row is None:
+            if not income and not expense:
+                continue
+            actual = None
+        else:
+            actual = {"income": row[0], "expenses": row[1], "savings": row[2]}
+            # Rows zeroed out by deletes compare equal to "no transactions"
+            if row == (income, expense, income - expense):
+                continue
+
+        user, year, month = key
+        drift.append({
+            "user_id": user,
+            "year": year,
+            "month": month,
+            "expected": {"income": income, "expenses": expense, "savings": income - expense},
+            "actual": actual,
+        })
+
+    return drift
+
+
+def rebuild_monthly_summaries(user_id=None) -> int:
+    """
+    Replaces MonthlySummary rows with totals recomputed from transactions.
+    Returns the number of rows written.
+    """
+    totals = compute_monthly_totals(user_id)
+
+    rows = [
+        MonthlySummary(
+            user_id=user,
+            year=year,
+            month=month,
+            total_income=income,
+            total_expense=expense,
+            savings=income - expense,
+        )
+        for (user, year, month), (income, expense) in totals.items()
+    ]
+
+    with transaction.atomic():
+        qs = MonthlySummary.objects.all()
+        if user_id is not None:
+            qs = qs.filter(user_id=user_id)
+        qs.delete()
+        MonthlySummary.objects.bulk_create(rows, batch_size=1000)
+
+    return len(rows)
+
+
+def compute_category_totals(user_id=None) -> dict:
+    """
+    Recomputes per-category monthly expense totals in one grouped query.
+
+    Returns:
+        dict: {(user_id, year, month, category_id): expense}
+    """
+    qs = Transaction.objects.filter(type=Transaction.TransactionType.EXPENSE)
+    if user_id is not None:
+        qs = qs.filter(user_id=user_id)
+
+    rows = (
+        qs
+        .annotate(year=ExtractYear("date"), month=ExtractMonth("date"))
+        .values("user_id", "year", "month", "category_id")
+        .annotate(expense=Sum("amount"))
+        .order_by()
+    )
+
+    return {
+        (r["user_id"], r["year"], r["month"], r["category_id"]): _money(r["expense"])
+        for r in rows
+    }
+
+
+def rebuild_category_spending(user_id=None) -> int:
+    """
+    Replaces CategoryMonthlySpending rows with totals recomputed from transactions.
+    Returns the number of rows written.
+    """
+    totals = compute_category_totals(user_id)
+
+    rows = [
+        CategoryMonthlySpending(
+            user_id=user,
+            year=year,
+            month=month,
+            category_id=category_id,
+            total_expense=expense,
+        )
+        for (user, year, month, category_id), expense in totals.items()
+    ]
+
+    with transaction.atomic():
+        qs = CategoryMonthlySpending.objects.all()
+        if user_id is not None:
+            qs = qs.filter(user_id=user_id)
+        qs.delete()
+        CategoryMonthlySpending.objects.bulk_create(rows, batch_size=1000)
+
+    return len(rows)
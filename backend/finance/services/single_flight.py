@@ -0,0 +1,101 @@
+"""
+Single-flight: concurrent calls for the same key share one execution.
+
+SingleFlight coalesces threads, AsyncSingleFlight coroutines on the same
+event loop. Neither reaches other processes; callers that need that add a
+shared lock of their own (see ai_summary_cache's generation lease).
+"""
+import asyncio
+import threading
+import weakref
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """
+        Runs fn() unless a call for `key` is already in flight, in which
+        case it waits for that call and returns (or raises) its outcome.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+def _mark_retrieved(future):
+    # Nobody may be waiting; don't let asyncio log an unretrieved exception
+    if not future.cancelled():
+        future.exception()
+
+
+class AsyncSingleFlight:
+    """
+    For callers that produce the result incrementally (e.g. streaming it):
+    claim() tells a caller whether it leads; the leader resolves the shared
+    future with finish(), followers await it.
+    """
+
+    def __init__(self):
+        # Per event loop: a future can only be awaited on the loop that
+        # created it, and a closed loop takes its flights with it
+        self._calls = weakref.WeakKeyDictionary()
+
+    def _loop_calls(self):
+        loop = asyncio.get_running_loop()
+        calls = self._calls.get(loop)
+        if calls is None:
+            calls = self._calls[loop] = {}
+        return calls
+
+    def claim(self, key):
+        """
+        Returns (future, is_leader).
+        """
+        calls = self._loop_calls()
+        future = calls.get(key)
+        if future is not None:
+            return future, False
+
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_mark_retrieved)
+        calls[key] = future
+        return future, True
+
+    def finish(self, key, result=None, error=None):
+        future = self._loop_calls().pop(key)
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
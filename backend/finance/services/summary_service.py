@@ -1,56 +1,177 @@
-from django.db.models import Sum
+from datetime import date
+
+from django.db.models import Count, Q, Sum
 from django.db.models.functions import Coalesce
-from finance.models import Transaction
+from finance.ml.anomaly_service import ANOMALY_Z_THRESHOLD
+from finance.models import CategoryMonthlySpending, MonthlySummary, Transaction
+
+
+def month_bounds(year: int, month: int) -> tuple:
+    """
+    Returns the half-open [start, end) date range of a month.
+    Filtering on `date >= start AND date < end` stays sargable, unlike
+    `date__year` / `date__month`, which wrap the column in a function.
+    """
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def month_transactions(user, year: int, month: int):
+    """
+    Returns the user's transactions for a month as an index-friendly queryset.
+    """
+    start, end = month_bounds(year, month)
+    return Transaction.objects.filter(user=user, date__gte=start, date__lt=end)
 
 
 def get_monthly_summary(user, year: int, month: int) -> dict:
     """
     Returns total income, expenses, and savings for a given month.
+    Reads the MonthlySummary rollup kept current by rollup_service.
     """
 
-    transactions = Transaction.objects.filter(
-        user=user,
-        date__year=year,
-        date__month=month
+    row = (
+        MonthlySummary.objects
+        .filter(user=user, year=year, month=month)
+        .values("total_income", "total_expense", "savings")
+        .first()
     )
-    income_result = transactions.filter(type="INCOME").aggregate(total=Sum("amount"))
-    income = income_result["total"] or 0
 
-    expenses_result = transactions.filter(type="EXPENSE").aggregate(total=Sum("amount"))
-    expenses = expenses_result["total"] or 0
-    
+    if row is None:
+        return {"income": 0.0, "expenses": 0.0, "savings": 0.0}
 
-    
+    return _summary_from_row(row)
+
+
+def get_month_version(user, year: int, month: int) -> str:
+    """
+    When the month last changed: its MonthlySummary.updated_at, which
+    rollup_service bumps on every write that alters what the month shows.
+    One indexed lookup, used as the dashboard ETag before any aggregation.
+    """
+    updated_at = (
+        MonthlySummary.objects
+        .filter(user=user, year=year, month=month)
+        .values_list("updated_at", flat=True)
+        .first()
+    )
+    return updated_at.isoformat() if updated_at else "empty"
 
-    savings = income - expenses
 
+def _summary_from_row(row) -> dict:
     return {
-        "income": float(income),
-        "expenses": float(expenses),
-        "savings": float(savings)
+        "income": float(row["total_income"]),
+        "expenses": float(row["total_expense"]),
+        "savings": float(row["savings"])
     }
 
 
+def get_month_overview(user, year: int, month: int) -> dict:
+    """
+    Summary, category breakdown and anomaly count of a month from a single
+    query: the month's transactions grouped by category, with income,
+    expense and anomaly totals as conditional aggregates.
+
+    Returns:
+        {"summary": {...}, "breakdown": {name: total}, "anomalies": int}
+    """
+    anomalous = (
+        Q(anomaly_z_score__gt=ANOMALY_Z_THRESHOLD)
+        | Q(anomaly_z_score__lt=-ANOMALY_Z_THRESHOLD)
+    )
+
+    rows = (
+        month_transactions(user, year, month)
+        .values("category__name")
+        .annotate(
+            income=Sum("amount", filter=Q(type=Transaction.TransactionType.INCOME)),
+            expense=Sum("amount", filter=Q(type=Transaction.TransactionType.EXPENSE)),
+            anomalies=Count("id", filter=anomalous),
+        )
+        .order_by()
+    )
+
+    income = 0.0
+    expenses = 0.0
+    anomalies = 0
+    breakdown = {}
+
+    for row in rows:
+        income += float(row["income"] or 0)
+        expenses += float(row["expense"] or 0)
+        anomalies += row["anomalies"]
+
+        if row["expense"]:
+            category = row["category__name"] or "Uncategorized"
+            breakdown[category] = round(float(row["expense"]), 2)
+
+    return {
+        "summary": {
+            "income": round(income, 2),
+            "expenses": round(expenses, 2),
+            "savings": round(income - expenses, 2),
+        },
+        "breakdown": breakdown,
+        "anomalies": anomalies,
+    }
+
+
+def get_monthly_summaries(year: int, month: int) -> dict:
+    """
+    get_monthly_summary for every user with transactions in the month,
+    in one query. Returns {user_id: summary}.
+    """
+    rows = (
+        MonthlySummary.objects
+        .filter(year=year, month=month)
+        .exclude(total_income=0, total_expense=0)
+        .values("user_id", "total_income", "total_expense", "savings")
+        .order_by("user_id")
+    )
+    return {row["user_id"]: _summary_from_row(row) for row in rows}
+
+
 def get_category_spending(user, year: int, month: int) -> dict:
     """
     Returns category-wise expense totals for a given month.
+    Reads the CategoryMonthlySpending rollup kept current by rollup_service.
     """
 
-    transactions = (
-        Transaction.objects
-        .filter(
-            user=user,
-            type="EXPENSE",
-            date__year=year,
-            date__month=month
-        )
-        .values("category__name")
-        .annotate(total=Sum("amount"))
+    rows = (
+        CategoryMonthlySpending.objects
+        .filter(user=user, year=year, month=month)
+        .exclude(total_expense=0)
+        .values("category__name", "total_expense")
     )
 
     result = {}
-    for t in transactions:
-        category = t["category__name"] or "Uncategorized"
-        result[category] = float(t["total"])
+    for row in rows:
+        category = row["category__name"] or "Uncategorized"
+        result[category] = float(row["total_expense"])
+
+    return result
+
+
+def get_category_spending_by_user(year: int, month: int, user_ids) -> dict:
+    """
+    get_category_spending for many users in one query.
+    Returns {user_id: {category name: total}}, with {} for users without expenses.
+
+    Reads the whole month and keeps the wanted users in Python, rather than
+    binding one parameter per user (SQLite caps bound variables).
+    """
+    result = {user_id: {} for user_id in user_ids}
+
+    rows = (
+        CategoryMonthlySpending.objects
+        .filter(year=year, month=month)
+        .exclude(total_expense=0)
+        .values_list("user_id", "category__name", "total_expense")
+    )
+
+    for user_id, name, total in rows:
+        if user_id in result:
+            result[user_id][name or "Uncategorized"] = float(total)
 
     return result
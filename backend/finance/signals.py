@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from finance.models import Category
+from finance.services import category_cache, rollup_service
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, instance, **kwargs):
+    category_cache.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def touch_dashboards(sender, instance, created=False, **kwargs):
+    # Breakdowns show category names; a new category changes nothing yet
+    if not created:
+        rollup_service.touch_monthly_summaries([instance.user_id])
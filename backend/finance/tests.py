@@ -0,0 +1,132 @@
+import os
+import subprocess
+import sys
+from datetime import date
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q, Sum
+from django.test import TestCase
+
+from finance.models import Transaction
+from finance.services.summary_service import month_transactions
+
+STARTUP_BUDGET_MS = 1000  # django.setup() plus the URLconf
+
+# Imported on first use only; none of these may load at startup
+DEFERRED_MODULES = [
+    "langchain",
+    "langchain_core",
+    "openai",
+    "sklearn",
+    "scipy",
+    "numpy",
+]
+
+
+def parse_importtime(stderr):
+    """
+    Parses `python -X importtime` output.
+
+    Returns:
+        (set of imported module names, total startup time in microseconds)
+    """
+    modules = set()
+    total_us = 0
+
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_us, _, name = line.split("|", 2)
+        total_us += int(self_us.split(":")[1])
+        modules.add(name.strip())
+
+    return modules, total_us
+
+
+@skipUnless(connection.vendor == "sqlite", "Plans are checked with SQLite's EXPLAIN QUERY PLAN")
+class HotQueryPlanTests(TestCase):
+    """
+    The hot Transaction queries must keep using their composite indexes.
+    """
+
+    user_id = 1
+    category_id = 1
+    expense = Transaction.TransactionType.EXPENSE
+
+    def assertUsesIndex(self, qs, index_name):
+        plan = qs.explain()
+        self.assertIn(index_name, plan, f"expected {index_name}:\n{plan}")
+
+    def test_transaction_list(self):
+        # TransactionListCreateView
+        self.assertUsesIndex(
+            Transaction.objects.filter(user_id=self.user_id).order_by("-date", "-id"),
+            "txn_user_date_idx",
+        )
+
+    def test_dashboard_overview(self):
+        # DashboardAPIView month overview (grouped conditional sums)
+        self.assertUsesIndex(
+            month_transactions(self.user_id, 2026, 1)
+            .values("category__name")
+            .annotate(expense=Sum("amount", filter=Q(type=self.expense)))
+            .order_by(),
+            "txn_user_date_idx",
+        )
+
+    def test_month_by_type(self):
+        # Monthly totals for a single type
+        self.assertUsesIndex(
+            month_transactions(self.user_id, 2026, 1).filter(type=self.expense),
+            "txn_user_type_date_idx",
+        )
+
+    def test_category_baseline(self):
+        # compute_anomaly_stats baselines
+        self.assertUsesIndex(
+            Transaction.objects.filter(
+                user_id=self.user_id,
+                category_id=self.category_id,
+                type=self.expense,
+                date__gte=date(2026, 1, 1),
+            ),
+            "txn_user_cat_type_date_idx",
+        )
+
+
+class StartupImportTests(TestCase):
+    """
+    Startup stays under budget and keeps the heavy dependencies lazy.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # A fresh interpreter: this process has already imported everything
+        code = f"import django; django.setup(); import {settings.ROOT_URLCONF}"
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE}
+
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise AssertionError(f"Startup failed:\n{result.stderr[-2000:]}")
+
+        cls.modules, cls.total_us = parse_importtime(result.stderr)
+
+    def test_heavy_modules_stay_lazy(self):
+        eager = [name for name in DEFERRED_MODULES if name in self.modules]
+        self.assertEqual(eager, [], "imported at startup")
+
+    def test_startup_within_budget(self):
+        self.assertLessEqual(
+            self.total_us / 1000,
+            STARTUP_BUDGET_MS,
+            f"startup imports across {len(self.modules)} modules",
+        )
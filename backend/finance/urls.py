@@ -1,12 +1,18 @@
 from django.urls import path
+from django.views.decorators.csrf import csrf_exempt
 from .views import (
     CategoryListCreateView,
     TransactionListCreateView,
     TransactionDetailView,
+    BulkTransactionCreateView,
     PredictCategoryView,
+    PredictCategoryBatchView,
+    MLArtifactsView,
     MonthlyAISummaryView,
+    MonthlyAISummaryStreamView,
     CategoryBreakdownAPIView,
     MonthlySummaryAPIView,   # NEW
+    DashboardAPIView,
 )
 
 
@@ -14,9 +20,15 @@ urlpatterns = [
     path('categories/', CategoryListCreateView.as_view()),
     path('transactions/', TransactionListCreateView.as_view()),
     path('transactions/<int:pk>/', TransactionDetailView.as_view()),
+    path('transactions/bulk/', BulkTransactionCreateView.as_view()),
     path('transactions/predict-category/', PredictCategoryView.as_view()),
+    path('transactions/predict-category/batch/', PredictCategoryBatchView.as_view()),
+    path('ml/artifacts/', MLArtifactsView.as_view()),
     path("ai/monthly-summary/", MonthlyAISummaryView.as_view()),
+    # Bearer-token auth, like the DRF views, so no CSRF cookie is involved
+    path("ai/monthly-summary/stream/", csrf_exempt(MonthlyAISummaryStreamView.as_view())),
     path("monthly-summary/", MonthlySummaryAPIView.as_view()),
     path("category-breakdown/", CategoryBreakdownAPIView.as_view()),
+    path("dashboard/", DashboardAPIView.as_view()),
 
 ]
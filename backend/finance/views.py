@@ -1,3 +1,12 @@
+import asyncio
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
+from django.db import transaction as db_transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.http import parse_etags, quote_etag
+from django.views import View
 from rest_framework import generics, permissions
 from .models import Transaction
 from .serializers import TransactionSerializer
@@ -6,25 +15,76 @@ from .serializers import CategorySerializer
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .ml.inference import predict_category
-from finance.ml.anomaly_service import compute_z_score
+from .ml import registry
+from .ml.inference import predict_categories, prediction_cache_info
+from .ml.predict import resolve_labels
+from finance.ml.anomaly_service import ANOMALY_Z_THRESHOLD, compute_z_score
 from .serializers import MonthlyAISummaryRequestSerializer
-from finance.ai.agent import run_finance_agent
+from .serializers import TransactionFilterSerializer
+from .serializers import DashboardQuerySerializer
+from .serializers import TransactionImportRowSerializer
+from .serializers import PredictCategoryBatchSerializer
+from .pagination import TransactionCursorPagination
+from .parsers import CSVParser, read_csv_rows
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from finance.services import ai_summary_cache
 from finance.services.summary_service import (
     get_monthly_summary,
     get_category_spending,
+    get_month_overview,
+    get_month_version,
+    month_transactions,
 )
+from finance.services import rollup_service
+from finance.services.import_service import MAX_IMPORT_ROWS, import_transactions
 
 
 
 class TransactionListCreateView(generics.ListCreateAPIView):
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TransactionCursorPagination
 
     def get_queryset(self):
-        return Transaction.objects.filter(user=self.request.user).order_by('-date')
-
+        return Transaction.objects.filter(user=self.request.user).order_by('-date', '-id')
+
+    def get_list_params(self):
+        if not hasattr(self, "_list_params"):
+            params = TransactionFilterSerializer(data=self.request.query_params)
+            params.is_valid(raise_exception=True)
+            self._list_params = params.validated_data
+        return self._list_params
+
+    def filter_queryset(self, queryset):
+        params = self.get_list_params()
+
+        # All filters are plain column comparisons so they stay on the
+        # (user, date) / (user, type, date) / (user, category, type, date) indexes
+        if "date_from" in params:
+            queryset = queryset.filter(date__gte=params["date_from"])
+        if "date_to" in params:
+            queryset = queryset.filter(date__lte=params["date_to"])
+        if "type" in params:
+            queryset = queryset.filter(type=params["type"])
+        if "category" in params:
+            queryset = queryset.filter(category_id=params["category"])
+
+        fields = params.get("fields")
+        if fields:
+            # Always load the pagination keys
+            queryset = queryset.only(*(set(fields) | {"id", "date"}))
+
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method == "GET":
+            kwargs.setdefault("fields", self.get_list_params().get("fields"))
+        return super().get_serializer(*args, **kwargs)
+
+    @db_transaction.atomic
     def perform_create(self, serializer):
         transaction = serializer.save(user=self.request.user)
 
@@ -49,6 +109,52 @@ class TransactionListCreateView(generics.ListCreateAPIView):
                     transaction.anomaly_z_score = z_score
                     transaction.save(update_fields=["anomaly_z_score"])
 
+        rollup_service.transaction_created(transaction)
+
+
+class BulkTransactionCreateView(APIView):
+    """
+    Imports many transactions at once, as a JSON list
+    (or {"transactions": [...]}), a text/csv body, or a multipart `file` upload.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [JSONParser, CSVParser, MultiPartParser]
+
+    def post(self, request):
+        if "file" in request.FILES:
+            try:
+                rows = read_csv_rows(request.FILES["file"].read().decode("utf-8"))
+            except UnicodeDecodeError:
+                return Response(
+                    {"detail": "CSV file must be UTF-8 encoded."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        elif isinstance(request.data, dict):
+            rows = request.data.get("transactions")
+        else:
+            rows = request.data
+
+        if not isinstance(rows, list) or not rows:
+            return Response(
+                {"detail": "A non-empty list of transactions is required."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(rows) > MAX_IMPORT_ROWS:
+            return Response(
+                {"detail": f"At most {MAX_IMPORT_ROWS} transactions per request."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = TransactionImportRowSerializer(data=rows, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        created = import_transactions(request.user, serializer.validated_data)
+
+        return Response(
+            {"created": len(created), "ids": [tx.id for tx in created]},
+            status=status.HTTP_201_CREATED
+        )
 
 
 class TransactionDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -58,6 +164,34 @@ class TransactionDetailView(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         return Transaction.objects.filter(user=self.request.user)
 
+    @db_transaction.atomic
+    def perform_update(self, serializer):
+        old = rollup_service.snapshot(serializer.instance)
+        transaction = serializer.save()
+
+        # A new amount, category or type makes the stored score stale
+        new = rollup_service.snapshot(transaction)
+        if (old.amount, old.category_id, old.type) != (new.amount, new.category_id, new.type):
+            z_score = None
+            if transaction.type == "EXPENSE":
+                z_score = compute_z_score(
+                    user_id=transaction.user_id,
+                    category_id=transaction.category_id,
+                    amount=transaction.amount
+                )
+
+            if z_score != transaction.anomaly_z_score:
+                transaction.anomaly_z_score = z_score
+                transaction.save(update_fields=["anomaly_z_score"])
+
+        rollup_service.transaction_updated(old, transaction)
+
+    @db_transaction.atomic
+    def perform_destroy(self, instance):
+        old = rollup_service.snapshot(instance)
+        instance.delete()
+        rollup_service.transaction_deleted(old)
+
 class CategoryListCreateView(generics.ListCreateAPIView):
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -80,17 +214,60 @@ class PredictCategoryView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        predicted_category_id = predict_category(note)
+        labels = predict_categories([note])
+        predicted_category_id = resolve_labels(request.user.id, labels)[0]
 
         return Response(
-            {"predicted_category": predicted_category_id},
+            {
+                "predicted_category": predicted_category_id,
+                "predicted_label": labels[0],
+            },
             status=status.HTTP_200_OK
 )
 
+class PredictCategoryBatchView(APIView):
+    """
+    Predicts categories for up to 500 notes in one model call.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = PredictCategoryBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        labels = predict_categories(serializer.validated_data["notes"])
+
+        return Response(
+            {
+                "predicted_categories": resolve_labels(request.user.id, labels),
+                "predicted_labels": labels,
+            },
+            status=status.HTTP_200_OK
+        )
+
+class MLArtifactsView(APIView):
+    """
+    Per-worker view of the loaded ML artifacts: version, load time and size.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(
+            {
+                "artifacts": registry.metrics(),
+                "prediction_cache": prediction_cache_info(),
+            },
+            status=status.HTTP_200_OK
+        )
+
+
 class MonthlyAISummaryView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
+        # langchain/openai add seconds to startup; load them on first AI request
+        from finance.ai.agent import run_finance_agent
+
         serializer = MonthlyAISummaryRequestSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
@@ -106,12 +283,139 @@ class MonthlyAISummaryView(APIView):
             )
             return Response({"summary": summary})
 
+        except ai_summary_cache.SummaryInProgress:
+            # Another worker is on it; ask the client to come back for the result
+            response = Response({"status": "generating"}, status=status.HTTP_202_ACCEPTED)
+            response["Retry-After"] = "2"
+            return response
+
         except Exception:
             return Response(
                 {"error": "AI service unavailable"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+def _sse(data, event=None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+async def _authenticate_jwt(request):
+    """
+    DRF authentication for a plain async Django view.
+    Returns the user, or None for a missing or invalid token.
+    """
+    try:
+        result = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+class MonthlyAISummaryStreamView(View):
+    """
+    Streams the AI monthly summary as Server-Sent Events.
+
+    Async, so a slow LLM holds no worker thread when served through
+    backend/asgi.py. Events: `data: {"token": ...}` per fragment, then
+    `event: done` or `event: error`.
+    """
+
+    async def post(self, request):
+        # langchain/openai add seconds to startup; load them on first AI request
+        from finance.ai.agent import prepare_summary
+        from finance.ai.llm import LLMUnavailable, stream_llama
+
+        user = await _authenticate_jwt(request)
+        if user is None:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse(
+                {"detail": "Invalid JSON."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = MonthlyAISummaryRequestSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        year = serializer.validated_data["year"]
+        month = serializer.validated_data["month"]
+
+        data_fingerprint, prompt = await sync_to_async(prepare_summary)(user.id, year, month)
+        cached = await sync_to_async(ai_summary_cache.get_cached)(
+            user.id, year, month, data_fingerprint
+        )
+
+        key = ai_summary_cache.flight_key(user.id, year, month, data_fingerprint)
+
+        async def events():
+            if cached is not None:
+                yield _sse({"token": cached})
+                yield _sse({}, event="done")
+                return
+
+            flight, leader = ai_summary_cache.async_flights.claim(key)
+
+            if not leader:
+                # The same summary is already streaming to another request
+                try:
+                    summary = await asyncio.shield(flight)
+                except LLMUnavailable:
+                    yield _sse({"error": "AI service unavailable"}, event="error")
+                    return
+
+                yield _sse({"token": summary})
+                yield _sse({}, event="done")
+                return
+
+            summary = None
+            lease = None
+            error = LLMUnavailable("Summary stream was interrupted")
+            try:
+                # Waits while another worker generates the same summary
+                summary, lease = await ai_summary_cache.async_acquire(
+                    user.id, year, month, data_fingerprint
+                )
+                if summary is not None:
+                    yield _sse({"token": summary})
+                else:
+                    parts = []
+                    async for token in stream_llama(prompt):
+                        parts.append(token)
+                        yield _sse({"token": token})
+
+                    summary = "".join(parts)
+                    await sync_to_async(ai_summary_cache.store)(
+                        user.id, year, month, data_fingerprint, summary
+                    )
+                error = None
+            except LLMUnavailable as exc:
+                error = exc
+                yield _sse({"error": "AI service unavailable"}, event="error")
+                return
+            finally:
+                ai_summary_cache.async_flights.finish(key, summary, error)
+                if lease is not None:
+                    await sync_to_async(ai_summary_cache.release_lease)(
+                        user.id, year, month, lease
+                    )
+
+            yield _sse({}, event="done")
+
+        response = StreamingHttpResponse(events(), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # Stop proxies from buffering the stream
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
 class MonthlySummaryAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -133,6 +437,59 @@ class MonthlySummaryAPIView(APIView):
         return Response({"summary": summary}, status=status.HTTP_200_OK)
 
 
+class DashboardAPIView(APIView):
+    """
+    Everything the dashboard shows for one month in two queries: the
+    grouped month overview and the most recent transactions.
+    Supports If-None-Match; the ETag is derived from the month's rollup
+    version, so a 304 costs one indexed lookup and no aggregation.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        params = DashboardQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        year = params.validated_data["year"]
+        month = params.validated_data["month"]
+        recent_count = params.validated_data["recent"]
+
+        version = get_month_version(request.user, year, month)
+        etag = quote_etag(hashlib.sha1(
+            f"{request.user.id}:{year}:{month}:{recent_count}:"
+            f"{ANOMALY_Z_THRESHOLD}:{version}".encode()
+        ).hexdigest())
+
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            overview = get_month_overview(request.user, year, month)
+            recent = (
+                month_transactions(request.user, year, month)
+                .order_by("-date", "-id")[:recent_count]
+            )
+
+            response = Response(
+                {
+                    "year": year,
+                    "month": month,
+                    "summary": overview["summary"],
+                    "breakdown": overview["breakdown"],
+                    "anomalies": {
+                        "count": overview["anomalies"],
+                        "z_threshold": ANOMALY_Z_THRESHOLD,
+                    },
+                    "recent_transactions": TransactionSerializer(recent, many=True).data,
+                },
+                status=status.HTTP_200_OK,
+            )
+
+        response["ETag"] = etag
+        # Let browsers keep it but revalidate every time
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
 class CategoryBreakdownAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -2,47 +2,527 @@ import azure.functions as func
 import json
 import logging
 import os
-import pyodbc
-from azure.storage.queue import QueueClient
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 
 app = func.FunctionApp()
 
-# ---------- Helper: SQL connection ----------
-def get_sql_connection():
-    conn_str = os.environ["SQL_CONNECTION_STRING"]
-    return pyodbc.connect(conn_str)
+Z_THRESHOLD = 3.0
+QUEUE_NAME = "anomaly-alerts"
 
+# "azure": Azure SQL + Storage queue. "local": a SQLite file and a JSON-lines
+# file standing in for the queue, so the scorer can be load-tested offline.
+SCORER_BACKEND = os.environ.get("SCORER_BACKEND", "azure")
+LOCAL_DB_PATH = os.environ.get("LOCAL_DB_PATH", "scorer_local.db")
+LOCAL_QUEUE_PATH = os.environ.get("LOCAL_QUEUE_PATH", "scorer_local_queue.jsonl")
 
-# ---------- Helper: Load anomaly stats ----------
-def get_anomaly_stats(conn, user_id, category_id):
+SQL_POOL_SIZE = int(os.environ.get("SQL_POOL_SIZE", "4"))
+MAX_BATCH_SIZE = 1000
+STATS_LOOKUP_CHUNK = 500  # pairs per query; SQL Server allows 2100 parameters
+ALERTS_PER_MESSAGE = 200  # keeps queue messages well under the 64 KB limit
+HEALTH_CHECK_AFTER = 60.0  # seconds idle before a pooled connection is pinged
+
+# Stats only change when migrate_anomaly_stats runs. After STATS_CACHE_TTL
+# seconds the cache re-reads the version stamp once and is cleared if it moved.
+STATS_CACHE_TTL = float(os.environ.get("STATS_CACHE_TTL", "300"))
+STATS_CACHE_MAX_ENTRIES = int(os.environ.get("STATS_CACHE_MAX_ENTRIES", "100000"))
+
+
+# ---------- SQL ----------
+
+# Bumped by migrate_anomaly_stats whenever anomaly_stats changes
+STATS_VERSION_SQL = "SELECT version FROM anomaly_stats_version WHERE id = 1"
+
+# Newest stats row per (user_id, category_id) wins: rows come back in id order.
+# {pairs} is replaced by one "(?, ?)" per pair.
+STATS_LOOKUP_SQL = {
+    "azure": """
+        SELECT s.user_id, s.category_id, s.mean, s.std_dev
+        FROM anomaly_stats AS s
+        JOIN (VALUES {pairs}) AS k (user_id, category_id)
+          ON s.user_id = k.user_id AND s.category_id = k.category_id
+        ORDER BY s.id
+    """,
+    "local": """
+        SELECT s.user_id, s.category_id, s.mean, s.std_dev
+        FROM anomaly_stats AS s
+        JOIN (VALUES {pairs}) AS k
+          ON s.user_id = k.column1 AND s.category_id = k.column2
+        ORDER BY s.id
+    """,
+}
+
+INSERT_TRANSACTION_SQL = """
+    INSERT INTO anomaly_transactions (user_id, category_id, amount, z_score, is_anomaly)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+# Same tables as Azure SQL (see azure_integration_proj_documentation.md)
+LOCAL_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS anomaly_stats (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        category_id INTEGER NOT NULL,
+        mean REAL NOT NULL,
+        std_dev REAL NOT NULL,
+        sample_count INTEGER NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS anomaly_transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        category_id INTEGER NOT NULL,
+        amount REAL NOT NULL,
+        z_score REAL,
+        is_anomaly INTEGER,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS anomaly_stats_version (
+        id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    INSERT OR IGNORE INTO anomaly_stats_version (id, version) VALUES (1, 0);
+"""
+
+
+def _connect():
+    if SCORER_BACKEND == "local":
+        conn = sqlite3.connect(
+            LOCAL_DB_PATH,
+            isolation_level=None,  # autocommit, like the Azure connection
+            check_same_thread=False,
+            timeout=30,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(LOCAL_SCHEMA)
+        return conn
+
+    # Imported on first use to keep the host's cold start short
+    import pyodbc
+
+    return pyodbc.connect(os.environ["SQL_CONNECTION_STRING"], autocommit=True)
+
+
+def _disconnect_errors():
+    """
+    Connection-level errors: worth one more attempt on a fresh connection
+    when nothing could have been written.
+    """
+    if SCORER_BACKEND == "local":
+        return (sqlite3.OperationalError,)
+
+    import pyodbc
+
+    return (pyodbc.OperationalError, pyodbc.InterfaceError)
+
+
+class ConnectionPool:
+    """
+    Keeps up to `size` idle connections across warm invocations. Connections
+    idle for longer than HEALTH_CHECK_AFTER are pinged before reuse, and a
+    connection that raised is closed instead of being returned.
+    """
+
+    def __init__(self, connect, size):
+        self._connect = connect
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    @contextmanager
+    def connection(self):
+        conn = self._checkout()
+
+        try:
+            yield conn
+        except BaseException:
+            self._close(conn)
+            raise
+
+        try:
+            self._idle.put_nowait((conn, time.monotonic()))
+        except queue.Full:
+            self._close(conn)
+
+    def _checkout(self):
+        """
+        A live connection on which nothing has run yet.
+        """
+        try:
+            conn, last_used = self._idle.get_nowait()
+        except queue.Empty:
+            return self._open()
+
+        if time.monotonic() - last_used > HEALTH_CHECK_AFTER and not self._alive(conn):
+            self._close(conn)
+            return self._open()
+        return conn
+
+    def _open(self):
+        # No statement has run yet, so a failed connect is always retried
+        errors = _disconnect_errors()
+        for attempt in range(2):
+            try:
+                return self._connect()
+            except errors as e:
+                if attempt:
+                    raise
+                logging.warning(f"SQL connect failed, retrying: {e}")
+
+    @staticmethod
+    def _alive(conn):
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_pool = None
+_queue_client = None
+_init_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _init_lock:
+            if _pool is None:
+                _pool = ConnectionPool(_connect, SQL_POOL_SIZE)
+    return _pool
+
+
+def run_sql(fn, retry=False):
+    """
+    Runs fn(conn) on a pooled connection.
+
+    retry=True is for read-only fn: after a connection error the connection
+    is dropped and fn runs once more on a fresh one. Writes run once: an
+    autocommitted INSERT may already be stored when the error arrives, so
+    repeating it could store the row twice.
+    """
+    errors = _disconnect_errors()
+    for attempt in range(2):
+        try:
+            with get_pool().connection() as conn:
+                return fn(conn)
+        except errors as e:
+            if attempt or not retry:
+                raise
+            logging.warning(f"SQL connection lost, reconnecting: {e}")
+
+
+# ---------- Helper: Stats cache ----------
+class StatsCache:
+    """
+    LRU cache of {(user_id, category_id): (mean, std_dev) or None}, shared by
+    the invocations of a warm instance. None records that a pair has no
+    stats, so unknown pairs don't go back to SQL either.
+
+    The whole cache is valid until `ttl` seconds after the last version check;
+    the next lookup then reads the version stamp and clears everything if it
+    changed.
+    """
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._valid_until = 0.0
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def validate(self, conn):
+        if time.monotonic() < self._valid_until:
+            return
+
+        cursor = conn.cursor()
+        cursor.execute(STATS_VERSION_SQL)
+        row = cursor.fetchone()
+        cursor.close()
+        version = row[0] if row else None
+
+        with self._lock:
+            if version is None or version != self._version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._nbytes = 0
+                self._version = version
+            self._valid_until = time.monotonic() + self.ttl
+
+    def get_many(self, pairs):
+        """
+        Returns ({pair: stats} for cached pairs, [pairs not cached], version).
+        """
+        found = {}
+        missing = []
+        with self._lock:
+            version = self._version
+            for pair in pairs:
+                if pair in self._entries:
+                    self._entries.move_to_end(pair)
+                    found[pair] = self._entries[pair]
+                else:
+                    missing.append(pair)
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing, version
+
+    def put_many(self, items, version):
+        with self._lock:
+            # Fetched before an invalidation: don't cache possibly stale rows
+            if version != self._version:
+                return
+
+            for pair, stats in items.items():
+                if pair in self._entries:
+                    self._nbytes -= _entry_nbytes(pair, self._entries[pair])
+                self._entries[pair] = stats
+                self._entries.move_to_end(pair)
+                self._nbytes += _entry_nbytes(pair, stats)
+
+            while len(self._entries) > self.max_entries:
+                pair, stats = self._entries.popitem(last=False)
+                self._nbytes -= _entry_nbytes(pair, stats)
+                self.evictions += 1
+
+    def info(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "approx_bytes": self._nbytes,
+            "ttl_seconds": self.ttl,
+            "version": self._version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+def _entry_nbytes(pair, stats):
+    # Key and value tuples plus their numbers; dict slots are not counted
+    size = sys.getsizeof(pair) + sum(sys.getsizeof(x) for x in pair)
+    if stats is not None:
+        size += sys.getsizeof(stats) + sum(sys.getsizeof(x) for x in stats)
+    return size
+
+
+stats_cache = StatsCache(STATS_CACHE_TTL, STATS_CACHE_MAX_ENTRIES)
+
+
+def lookup_stats(conn, pairs):
+    """
+    Returns {pair: (mean, std_dev) or None}, querying SQL only for pairs
+    the cache doesn't have.
+    """
+    stats_cache.validate(conn)
+    found, missing, version = stats_cache.get_many(pairs)
+
+    if missing:
+        fetched = fetch_stats(conn, missing)
+        loaded = {pair: fetched.get(pair) for pair in missing}
+        stats_cache.put_many(loaded, version)
+        found.update(loaded)
+
+    return found
+
+
+# ---------- Helper: Score and store a transaction ----------
+def score_and_insert(user_id, category_id, amount):
+    """
+    Returns (z_score, is_anomaly). z_score is 0 when no stats exist.
+    """
+    pair = (user_id, category_id)
+    # Read-only, so a dead pooled connection is replaced and the lookup rerun
+    stats = run_sql(lambda conn: lookup_stats(conn, [pair]), retry=True)[pair]
+
+    z_score = 0.0
+    if stats is not None and stats[1] != 0:
+        mean, std_dev = stats
+        z_score = (amount - mean) / std_dev
+    is_anomaly = abs(z_score) > Z_THRESHOLD
+
+    row = (user_id, category_id, amount, z_score, int(is_anomaly))
+    run_sql(lambda conn: insert_one(conn, row))
+    return z_score, is_anomaly
+
+
+def insert_one(conn, row):
+    cursor = conn.cursor()
+    cursor.execute(INSERT_TRANSACTION_SQL, row)
+    cursor.close()
+
+
+@contextmanager
+def transaction(conn):
+    """
+    Groups statements on an autocommit connection into one commit.
+    """
+    if SCORER_BACKEND == "local":
+        conn.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return
+
+    conn.autocommit = False
+    try:
+        yield
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.autocommit = True
+
+
+# ---------- Helper: Score and store a batch ----------
+_np = None
+
+
+def get_numpy():
+    # Imported on first batch: the single-transaction route never needs it
+    global _np
+    if _np is None:
+        import numpy
+
+        _np = numpy
+    return _np
+
+
+def fetch_stats(conn, pairs):
+    """
+    Returns {(user_id, category_id): (mean, std_dev)} for the pairs that have stats.
+    """
+    pairs = list(pairs)
+    stats = {}
     cursor = conn.cursor()
-    cursor.execute("""
-        SELECT mean, std_dev, sample_count
-        FROM anomaly_stats
-        WHERE user_id = ? AND category_id = ?
-    """, (user_id, category_id))
 
-    row = cursor.fetchone()
-    return row
+    for start in range(0, len(pairs), STATS_LOOKUP_CHUNK):
+        chunk = pairs[start:start + STATS_LOOKUP_CHUNK]
+        sql = STATS_LOOKUP_SQL[SCORER_BACKEND].format(
+            pairs=", ".join(["(?, ?)"] * len(chunk))
+        )
+        cursor.execute(sql, [value for pair in chunk for value in pair])
+        for user_id, category_id, mean, std_dev in cursor.fetchall():
+            stats[(user_id, category_id)] = (mean, std_dev)
+
+    cursor.close()
+    return stats
+
+
+def score_batch(items):
+    """
+    Scores and stores [(user_id, category_id, amount), ...].
+    Returns [(z_score, is_anomaly), ...] in the same order.
+    """
+    np = get_numpy()
+
+    pairs = {(user_id, category_id) for user_id, category_id, _ in items}
+    # Read-only, so a dead pooled connection is replaced and the lookup rerun
+    stats = run_sql(lambda conn: lookup_stats(conn, pairs), retry=True)
+
+    missing = (0.0, 0.0)
+    amounts = np.array([amount for _, _, amount in items], dtype=float)
+    means, stds = np.array(
+        [stats[(user_id, category_id)] or missing for user_id, category_id, _ in items],
+        dtype=float,
+    ).reshape(-1, 2).T
+
+    # Same rule as the single route: no stats or zero spread scores 0
+    z_scores = np.divide(
+        amounts - means, stds, out=np.zeros_like(amounts), where=stds != 0
+    )
+    anomalies = np.abs(z_scores) > Z_THRESHOLD
+
+    rows = [
+        (user_id, category_id, amount, z, int(flag))
+        for (user_id, category_id, amount), z, flag
+        in zip(items, z_scores.tolist(), anomalies.tolist())
+    ]
+
+    run_sql(lambda conn: insert_many(conn, rows))
 
+    return list(zip(z_scores.tolist(), anomalies.tolist()))
 
-# ---------- Helper: Insert transaction ----------
-def insert_transaction(conn, user_id, category_id, amount, z_score, is_anomaly):
+
+def insert_many(conn, rows):
     cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO anomaly_transactions (user_id, category_id, amount, z_score, is_anomaly)
-        VALUES (?, ?, ?, ?, ?)
-    """, (user_id, category_id, amount, z_score, is_anomaly))
-    conn.commit()
+    if SCORER_BACKEND != "local":
+        # One parameter array per round trip instead of a round trip per row
+        cursor.fast_executemany = True
+    with transaction(conn):
+        cursor.executemany(INSERT_TRANSACTION_SQL, rows)
+    cursor.close()
 
 
 # ---------- Helper: Send queue message ----------
+class FileQueue:
+    """
+    Local stand-in for QueueClient: appends one message per line.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send_message(self, content):
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(content + "\n")
+
+
+def get_queue_client():
+    global _queue_client
+    if _queue_client is None:
+        with _init_lock:
+            if _queue_client is None:
+                if SCORER_BACKEND == "local":
+                    _queue_client = FileQueue(LOCAL_QUEUE_PATH)
+                else:
+                    # Only anomalies reach the queue; most invocations never need the SDK
+                    from azure.storage.queue import QueueClient
+
+                    _queue_client = QueueClient.from_connection_string(
+                        os.environ["AZURE_STORAGE_CONNECTION_STRING"], QUEUE_NAME
+                    )
+    return _queue_client
+
+
 def send_queue_message(payload):
-    queue_conn = os.environ["AZURE_STORAGE_CONNECTION_STRING"]
-    queue_name = "anomaly-alerts"
+    get_queue_client().send_message(json.dumps(payload))
 
-    queue = QueueClient.from_connection_string(queue_conn, queue_name)
-    queue.send_message(json.dumps(payload))
+
+def send_alert_batches(alerts):
+    """
+    Sends alerts as {"alerts": [...]} messages of up to ALERTS_PER_MESSAGE each.
+    """
+    for start in range(0, len(alerts), ALERTS_PER_MESSAGE):
+        send_queue_message({"alerts": alerts[start:start + ALERTS_PER_MESSAGE]})
 
 
 # ---------- Main HTTP function ----------
@@ -63,26 +543,7 @@ def score_transaction(req: func.HttpRequest) -> func.HttpResponse:
         )
 
     try:
-        conn = get_sql_connection()
-
-        # Get stats
-        stats = get_anomaly_stats(conn, user_id, category_id)
-
-        if stats:
-            mean, std_dev, sample_count = stats
-
-            if std_dev == 0:
-                z_score = 0
-            else:
-                z_score = (amount - mean) / std_dev
-
-        else:
-            z_score = 0
-
-        is_anomaly = abs(z_score) > 3
-
-        # Insert transaction
-        insert_transaction(conn, user_id, category_id, amount, z_score, is_anomaly)
+        z_score, is_anomaly = score_and_insert(user_id, category_id, amount)
 
         # If anomaly → push to queue
         if is_anomaly:
@@ -115,3 +576,76 @@ def score_transaction(req: func.HttpRequest) -> func.HttpResponse:
             status_code=500,
             mimetype="application/json"
         )
+
+
+@app.route(route="score-transactions", auth_level=func.AuthLevel.FUNCTION)
+def score_transactions(req: func.HttpRequest) -> func.HttpResponse:
+    logging.info("score-transactions: Processing finance batch")
+
+    try:
+        body = req.get_json()
+        if not isinstance(body, list) or not 0 < len(body) <= MAX_BATCH_SIZE:
+            raise ValueError
+        items = [
+            (int(item["user_id"]), int(item["category_id"]), float(item["amount"]))
+            for item in body
+        ]
+    except Exception:
+        return func.HttpResponse(
+            json.dumps({
+                "error": "Invalid request body",
+                "details": f"Expected a list of 1-{MAX_BATCH_SIZE} transactions"
+            }),
+            status_code=400,
+            mimetype="application/json"
+        )
+
+    try:
+        scores = score_batch(items)
+
+        results = [
+            {
+                "user_id": user_id,
+                "category_id": category_id,
+                "amount": amount,
+                "z_score": z_score,
+                "is_anomaly": is_anomaly
+            }
+            for (user_id, category_id, amount), (z_score, is_anomaly)
+            in zip(items, scores)
+        ]
+
+        # Anomalies → queue, many alerts per message
+        alerts = [
+            {key: result[key] for key in ("user_id", "category_id", "amount", "z_score")}
+            for result in results
+            if result["is_anomaly"]
+        ]
+        send_alert_batches(alerts)
+
+        return func.HttpResponse(
+            json.dumps({
+                "count": len(results),
+                "anomalies": len(alerts),
+                "results": results
+            }),
+            status_code=200,
+            mimetype="application/json"
+        )
+
+    except Exception as e:
+        logging.error(str(e))
+        return func.HttpResponse(
+            json.dumps({"error": "Server error", "details": str(e)}),
+            status_code=500,
+            mimetype="application/json"
+        )
+
+
+@app.route(route="scorer-metrics", methods=["GET"], auth_level=func.AuthLevel.ADMIN)
+def scorer_metrics(req: func.HttpRequest) -> func.HttpResponse:
+    return func.HttpResponse(
+        json.dumps({"stats_cache": stats_cache.info()}),
+        status_code=200,
+        mimetype="application/json"
+    )
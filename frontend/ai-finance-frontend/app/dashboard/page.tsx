@@ -3,8 +3,7 @@
 import { useEffect, useState } from "react";
 import ProtectedRoute from "@/components/ProtectedRoute";
 import {
-  getMonthlySummary,
-  getCategoryBreakdown,
+  getDashboard,
   generateAIMonthlySummary,
 } from "@/lib/api";
 import Sidebar from "@/components/Sidebar";
@@ -63,12 +62,11 @@ const COLORS = [
   const fetchDashboardData = async () => {
     setLoading(true);
     try {
-      const summaryData = await getMonthlySummary(year, month);
-      const breakdownData = await getCategoryBreakdown(year, month);
+      const dashboard = await getDashboard(year, month);
 
-      setSummary(summaryData.summary);
+      setSummary(dashboard.summary);
 
-      const formatted = Object.entries(breakdownData.breakdown).map(
+      const formatted = Object.entries(dashboard.breakdown).map(
         ([name, value]) => ({
           name,
           value: value as number,
@@ -27,6 +27,7 @@ interface Transaction {
 
 export default function TransactionsPage() {
   const [transactions, setTransactions] = useState<Transaction[]>([]);
+  const [nextPage, setNextPage] = useState<string | null>(null);
   const [categories, setCategories] = useState<Category[]>([]);
 
   const [type, setType] = useState("EXPENSE");
@@ -38,9 +39,18 @@ export default function TransactionsPage() {
   const fetchData = async () => {
     const tx = await getTransactions();
     const cats = await getCategories();
-    setTransactions(tx);
+    setTransactions(tx.results);
+    setNextPage(tx.next);
     setCategories(cats);
   };
+
+  const loadMore = async () => {
+    if (!nextPage) return;
+
+    const tx = await getTransactions(nextPage);
+    setTransactions((prev) => [...prev, ...tx.results]);
+    setNextPage(tx.next);
+  };
   useEffect(() => {
     fetchData();
   }, []);
@@ -56,14 +66,12 @@ useEffect(() => {
           
           console.log("API Response:", prediction);
           
-          const predictedName = prediction.predicted_category;
-          
-          // FIXED: Proper case-insensitive match
-          const matched = categories.find(cat => 
-            cat.name.toLowerCase() === predictedName.toLowerCase()
+          // predicted_category is the id of one of the user's categories (or null)
+          const matched = categories.find(
+            (cat) => cat.id === prediction.predicted_category
           );
           
-          console.log("Matched category:", matched); // ← This will show truth now
+          console.log("Matched category:", matched);
           
           if (matched) {
             console.log("Setting category:", matched.id, matched.name);
@@ -197,6 +205,15 @@ useEffect(() => {
             </li>
           ))}
                 </ul>
+
+        {nextPage && (
+          <button
+            onClick={loadMore}
+            className="bg-blue-600 text-black px-4 py-2 rounded"
+          >
+            Load more
+          </button>
+        )}
       </div>
     </div>
     </ProtectedRoute>
@@ -34,8 +34,10 @@ export const getCategories = async () => {
     return response.data;
   };
 // Transactions
-export const getTransactions = async () => {
-    const response = await axiosInstance.get("/api/finance/transactions/");
+// Returns one page: { next: string | null, results: Transaction[] }.
+// Pass the previous page's `next` URL to load the following page.
+export const getTransactions = async (url: string = "/api/finance/transactions/") => {
+    const response = await axiosInstance.get(url);
     return response.data;
   };
   
@@ -79,6 +81,14 @@ export const getMonthlySummary = async (year: number, month: number) => {
     );
     return response.data;
   };
+
+  // Summary, breakdown, anomaly count and recent transactions in one request
+  export const getDashboard = async (year: number, month: number) => {
+    const response = await axiosInstance.get(
+      `/api/finance/dashboard/?year=${year}&month=${month}`
+    );
+    return response.data;
+  };
   // AI Monthly Summary
 export const generateAIMonthlySummary = async (
     year: number,